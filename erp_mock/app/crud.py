@@ -48,6 +48,31 @@ async def get_alumno_by_id(
     return result.scalar_one_or_none()
 
 
+async def get_alumnos_by_ids(
+    db: AsyncSession,
+    alumno_ids: List[str],
+    include_responsables: bool = False
+) -> List[Alumno]:
+    """
+    Obtiene varios alumnos por ID en una sola consulta.
+    
+    Args:
+        db: Sesión de base de datos
+        alumno_ids: IDs de los alumnos
+        include_responsables: Si incluir responsables en la respuesta
+    
+    Returns:
+        Lista de alumnos encontrados (los IDs inexistentes se omiten)
+    """
+    query = select(Alumno).where(Alumno.id.in_(alumno_ids))
+    
+    if include_responsables:
+        query = query.options(selectinload(Alumno.responsables))
+    
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
 async def get_alumnos_activos(db: AsyncSession) -> List[Alumno]:
     """Obtiene todos los alumnos activos."""
     query = select(Alumno).where(Alumno.activo == True)
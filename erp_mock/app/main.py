@@ -130,6 +130,28 @@ async def health_check():
 
 # ============== ALUMNOS ==============
 
+@app.get(
+    "/api/v1/alumnos",
+    response_model=List[AlumnoDetalleResponse],
+    tags=["Alumnos"],
+    summary="Obtener varios alumnos por ID"
+)
+async def get_alumnos(
+    ids: List[str] = Query(
+        [],
+        description="IDs de los alumnos (?ids=A001&ids=A002)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene varios alumnos en un solo request, con sus responsables.
+    Los IDs inexistentes se omiten de la respuesta.
+    """
+    if not ids:
+        return []
+    return await crud.get_alumnos_by_ids(db, ids, include_responsables=True)
+
+
 @app.get(
     "/api/v1/alumnos/{alumno_id}",
     response_model=AlumnoDetalleResponse,
@@ -96,6 +96,23 @@ async def test_get_alumno_no_existente(async_client: AsyncClient):
     assert "detail" in data
 
 
+@pytest.mark.asyncio
+async def test_get_alumnos_por_ids(async_client: AsyncClient):
+    """Test: Obtener varios alumnos omite los IDs inexistentes."""
+    response = await async_client.get(
+        "/api/v1/alumnos",
+        params={"ids": ["A001", "NO_EXISTE_123"]}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    if not data:
+        pytest.skip("Seed data no disponible")
+    
+    assert [a["id"] for a in data] == ["A001"]
+    assert "responsables" in data[0]
+
+
 @pytest.mark.asyncio
 async def test_get_alumno_cuotas(async_client: AsyncClient):
     """Test: Obtener cuotas de alumno retorna lista correcta."""
@@ -2,6 +2,7 @@
 Interface abstracta para clientes ERP.
 Define el contrato que deben cumplir todos los adaptadores ERP.
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional
 
@@ -25,6 +26,23 @@ class ERPClientInterface(ABC):
         """
         pass
     
+    async def get_alumnos_bulk(self, alumno_ids: list[str]) -> dict[str, dict]:
+        """
+        Obtiene varios alumnos por ID.
+        
+        Implementación por defecto: un get_alumno por ID en paralelo. Los
+        adaptadores con endpoint de lote la reemplazan por un solo request.
+        
+        Args:
+            alumno_ids: IDs de los alumnos en el ERP
+            
+        Returns:
+            dict[str, dict]: Datos de cada alumno encontrado, por ID
+        """
+        ids = list(dict.fromkeys(alumno_ids))
+        alumnos = await asyncio.gather(*(self.get_alumno(alumno_id) for alumno_id in ids))
+        return {alumno_id: data for alumno_id, data in zip(ids, alumnos) if data}
+    
     @abstractmethod
     async def get_alumno_cuotas(
         self, 
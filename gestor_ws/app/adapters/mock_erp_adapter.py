@@ -39,8 +39,15 @@ class MockERPAdapter(ERPClientInterface):
         if self._client is None:
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
-                timeout=30.0,
-                headers={"Content-Type": "application/json"}
+                # Connect corto: si el ERP no responde, fallar rápido
+                timeout=httpx.Timeout(30.0, connect=2.0),
+                headers={"Content-Type": "application/json"},
+                # Conexiones keep-alive reutilizadas entre requests y health checks
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=100,
+                    keepalive_expiry=30.0
+                )
             )
         return self._client
     
@@ -65,6 +72,19 @@ class MockERPAdapter(ERPClientInterface):
             logger.error(f"Error obteniendo alumno {alumno_id}: {e}")
             raise
     
+    async def get_alumnos_bulk(self, alumno_ids: list[str]) -> dict[str, dict]:
+        """Obtiene varios alumnos en un solo request (GET /alumnos?ids=...)."""
+        ids = list(dict.fromkeys(alumno_ids))
+        if not ids:
+            return {}
+        try:
+            response = await self.client.get("/api/v1/alumnos", params={"ids": ids})
+            response.raise_for_status()
+            return {alumno["id"]: alumno for alumno in response.json()}
+        except Exception as e:
+            logger.error(f"Error obteniendo {len(ids)} alumnos: {e}")
+            raise
+    
     async def get_alumno_cuotas(
         self, 
         alumno_id: str, 
@@ -172,7 +192,7 @@ class MockERPAdapter(ERPClientInterface):
     async def health_check(self) -> bool:
         """Verifica conectividad con el ERP Mock."""
         try:
-            response = await self.client.get("/health")
+            response = await self.client.get("/health", timeout=5.0)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"ERP Mock no disponible: {e}")
@@ -9,18 +9,29 @@ NUEVA ARQUITECTURA (agente_autonomo.py):
 LEGACY (deprecado, importar directamente si se necesita):
 - router.py, asistente.py, coordinador.py
 """
-# Nueva arquitectura jerárquica
-from app.agents.agente_autonomo import (
-    AgenteAutonomo,
-    get_agente_autonomo
-)
-from app.agents.states import (
-    AgentState,
-    MasterPlan,
-    SpecialistReport,
-    SpecialistType,
-    IntentType
-)
+import importlib
+
+# Nueva arquitectura jerárquica.
+# Se importa de forma lazy (PEP 562): importar un submódulo liviano
+# (ej: app.agents.response_cache) no arrastra LangGraph/LangChain.
+_LAZY_EXPORTS = {
+    "AgenteAutonomo": "app.agents.agente_autonomo",
+    "get_agente_autonomo": "app.agents.agente_autonomo",
+    "AgentState": "app.agents.states",
+    "MasterPlan": "app.agents.states",
+    "SpecialistReport": "app.agents.states",
+    "SpecialistType": "app.agents.states",
+    "IntentType": "app.agents.states",
+}
+
+
+def __getattr__(name: str):
+    module_path = _LAZY_EXPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     # Nueva arquitectura
@@ -0,0 +1,423 @@
+"""
+Harness compartido por los scripts de prueba del agente.
+
+Provee la configuración de logging, la ejecución de una suite de casos
+y el modo interactivo. Cada script define sus propios casos de prueba.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import sys
+import textwrap
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from app.agents.response_cache import ResponseCache, is_cache_enabled, make_key
+from app.mcp_client import ToolSchema, get_mcp_client
+
+
+logger = logging.getLogger(__name__)
+
+# Casos ejecutados en simultáneo contra el LLM
+MAX_CONCURRENT_TESTS = 4
+
+# Snapshot de los schemas de tools para sesiones interactivas
+AGENT_STATE_PATH = Path("logs") / "agent_state.json"
+
+# Separadores de la salida
+_DIV_THIN = "─" * 70
+_DIV_THICK = "=" * 70
+_DIV_SHORT = "─" * 40
+
+
+def install_uvloop() -> bool:
+    """
+    Usa uvloop como event loop si está instalado.
+    
+    uvicorn ya lo elige solo (viene con uvicorn[standard]); los scripts
+    que corren con asyncio.run() tienen que pedirlo. No existe en Windows.
+    
+    Returns:
+        bool: True si se instaló uvloop
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def setup_logging():
+    """
+    Configura logging igual que en main.py.
+    
+    La escritura a archivos se hace en un thread aparte (QueueListener):
+    el event loop solo encola el registro.
+    """
+    import atexit
+    import queue
+    from pathlib import Path
+    from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+    
+    log_format = (
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    # Crear directorio de logs si no existe
+    log_dir = Path("logs")
+    log_dir.mkdir(exist_ok=True)
+    
+    class SampledRotatingFileHandler(RotatingFileHandler):
+        """Chequea el tamaño para rotar solo cada `check_every` registros."""
+        check_every = 100
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._emit_count = 0
+        
+        def shouldRollover(self, record):
+            self._emit_count += 1
+            if self._emit_count % self.check_every:
+                return False
+            return super().shouldRollover(record)
+    
+    # File handler para logs generales (delay: el archivo se abre en el primer emit)
+    file_handler = SampledRotatingFileHandler(
+        log_dir / "gestor_ws.log",
+        maxBytes=64 * 1024 * 1024,  # 64MB
+        backupCount=3,
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setFormatter(logging.Formatter(log_format))
+    
+    # File handler específico para token usage (JSON), del logger "token_usage"
+    token_handler = SampledRotatingFileHandler(
+        log_dir / "token_usage.log",
+        maxBytes=64 * 1024 * 1024,  # 64MB
+        backupCount=3,
+        encoding="utf-8",
+        delay=True
+    )
+    token_handler.setFormatter(logging.Formatter(log_format))
+    
+    # Archivos detrás de una cola atendida por un thread en background
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    token_queue = queue.Queue(-1)
+    token_listener = QueueListener(token_queue, token_handler)
+    token_listener.start()
+    atexit.register(token_listener.stop)
+    
+    # El QueueHandler solo arma el mensaje; el formato lo aplica el file handler
+    # (basicConfig solo pone log_format en los handlers sin formatter)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    # Handlers: consola + cola hacia archivos
+    handlers = [logging.StreamHandler(sys.stdout), queue_handler]
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format=log_format,
+        handlers=handlers,
+        force=True  # Sobrescribir configuración previa
+    )
+    
+    token_logger = logging.getLogger("token_usage")
+    token_logger.propagate = False
+    token_logger.handlers = [QueueHandler(token_queue)]
+    
+    # Reducir verbosidad de librerías externas
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("httpcore").setLevel(logging.WARNING)
+    logging.getLogger("openai").setLevel(logging.WARNING)
+
+
+class AsyncBatcher:
+    """
+    Agrupa pedidos independientes en lotes para procesarlos juntos.
+    
+    Un lote se despacha al llegar a `batch_size` pedidos o al pasar
+    `max_wait` segundos desde el primer pedido pendiente. Cada llamador
+    recibe su propio resultado vía un Future.
+    """
+    
+    def __init__(self, handler, batch_size: int = 4, max_wait: float = 0.02):
+        """
+        Args:
+            handler: Coroutine que recibe una lista de items y devuelve
+                una lista de resultados en el mismo orden (una excepción
+                en la lista se entrega solo a ese llamador)
+            batch_size: Tamaño máximo del lote
+            max_wait: Espera máxima (segundos) antes de despachar un lote incompleto
+        """
+        self._handler = handler
+        self._batch_size = batch_size
+        self._max_wait = max_wait
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+    
+    async def submit(self, item):
+        """Encola un item y espera su resultado."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Despacha los pedidos pendientes como un lote."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: list[tuple[object, asyncio.Future]]) -> None:
+        """Ejecuta el handler y resuelve los Futures del lote."""
+        try:
+            results = await self._handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def procesar_con_cache(procesar, phone: str, mensaje: str, cache) -> str:
+    """
+    Procesa un mensaje con el agente, usando el cache de respuestas si
+    está habilitado (GESTOR_TEST_CACHE=1).
+    
+    Args:
+        procesar: Coroutine (phone, mensaje) -> respuesta
+    """
+    if cache is None:
+        return await procesar(phone, mensaje)
+    
+    key = make_key(phone, mensaje)
+    respuesta = cache.get(key)
+    if respuesta is None:
+        respuesta = await procesar(phone, mensaje)
+        cache.set(key, respuesta)
+    return respuesta
+
+
+async def run_suite(agente, phone: str, test_cases: list[dict]) -> bool:
+    """
+    Ejecuta una suite de casos de prueba contra el agente.
+    
+    Args:
+        agente: Instancia de AgenteAutonomo
+        phone: Número de WhatsApp de prueba
+        test_cases: Casos con categoria, mensaje y esperado
+        
+    Returns:
+        bool: True si todos los casos fueron exitosos
+    """
+    from datetime import datetime
+    
+    print(f"\n{_DIV_THICK}")
+    print("🤖 AGENTE AUTÓNOMO JERÁRQUICO - Suite de Pruebas")
+    print(_DIV_THICK)
+    print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(_DIV_THICK)
+    
+    # Calentar el agente (clientes, tools, cache de prompt del provider)
+    # para que el costo de inicialización no se cuente en el primer test
+    with contextlib.suppress(Exception):
+        await agente.procesar_sin_checkpoint(phone, "ping")
+    
+    cache = ResponseCache() if is_cache_enabled() else None
+    
+    # Ejecutar pruebas en paralelo (limitado para respetar rate limits del provider).
+    # El límite se aplica por mensaje dentro de procesar_batch: un lote no
+    # retiene lugares mientras espera a su mensaje más lento
+    sem = asyncio.Semaphore(MAX_CONCURRENT_TESTS)
+    
+    # Los mensajes concurrentes se agrupan en lotes hacia el agente
+    batcher = AsyncBatcher(
+        lambda items: agente.procesar_batch(items, semaphore=sem),
+        batch_size=MAX_CONCURRENT_TESTS
+    )
+    
+    async def procesar(phone: str, mensaje: str) -> str:
+        return await batcher.submit((phone, mensaje))
+    
+    exitosos = 0
+    fallidos_list: list[tuple[str, str]] = []
+    
+    async def run_one(i: int, test: dict) -> str:
+        """Ejecuta un caso de prueba y arma su salida en un único bloque."""
+        nonlocal exitosos
+        
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\n{_DIV_THIN}\n")
+        w(f"📌 TEST {i}/{len(test_cases)}: {test['categoria']}\n")
+        w(f"{_DIV_THIN}\n")
+        w(f"📥 INPUT: {test['mensaje']}\n")
+        w(f"🎯 ESPERADO: {test['esperado']}\n")
+        w(f"{_DIV_SHORT}\n")
+        
+        try:
+            # Usar versión sin checkpoint para testing simple
+            respuesta = await procesar_con_cache(procesar, phone, test["mensaje"], cache)
+            
+            w("📤 OUTPUT:\n")
+            w(textwrap.indent(respuesta, "   "))
+            w("\n")
+            exitosos += 1
+            
+        except Exception as e:
+            w(f"❌ ERROR: {e}\n")
+            fallidos_list.append((test["categoria"], str(e)))
+        
+        return buf.getvalue()
+    
+    salidas = await asyncio.gather(
+        *(run_one(i, test) for i, test in enumerate(test_cases, 1))
+    )
+    
+    if cache is not None:
+        cache.save()
+    
+    # Una sola escritura a stdout para todos los bloques, en orden
+    sys.stdout.write("".join(salidas))
+    sys.stdout.flush()
+    
+    # Resumen
+    print(f"\n{_DIV_THICK}")
+    print("📊 RESUMEN DE PRUEBAS")
+    print(_DIV_THICK)
+    
+    total = len(test_cases)
+    fallidos = len(fallidos_list)
+    
+    print(f"✅ Exitosos: {exitosos}/{total}")
+    print(f"❌ Fallidos: {fallidos}/{total}")
+    
+    if fallidos > 0:
+        print("\n⚠️ Pruebas fallidas:")
+        for categoria, error in fallidos_list:
+            print(f"   • {categoria}: {error}")
+    
+    print(f"\n{_DIV_THICK}")
+    print("🏁 Pruebas completadas")
+    print(f"{_DIV_THICK}\n")
+    
+    return exitosos == total
+
+
+async def restore_tool_schemas() -> None:
+    """
+    Precarga los schemas de tools del MCP desde AGENT_STATE_PATH.
+    Si no hay snapshot, los obtiene del servidor y lo guarda.
+    """
+    mcp = get_mcp_client()
+    
+    if AGENT_STATE_PATH.exists():
+        try:
+            with open(AGENT_STATE_PATH, encoding="utf-8") as f:
+                data = json.load(f)
+            mcp.set_tools_cache(
+                [ToolSchema(**t) for t in data["tool_schemas"]],
+                version=data.get("tools_version")
+            )
+            return
+        except Exception as e:
+            logger.warning(f"Snapshot de tools inválido, se regenera: {e}")
+    
+    tools = await mcp.list_tools()
+    if tools:
+        AGENT_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(AGENT_STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "tool_schemas": [asdict(t) for t in tools],
+                    "tools_version": mcp.tools_version
+                },
+                f,
+                ensure_ascii=False
+            )
+
+
+async def interactive(agente, phone: str) -> None:
+    """
+    Modo interactivo para probar el agente.
+    
+    Args:
+        agente: Instancia de AgenteAutonomo
+        phone: Número de WhatsApp de prueba
+    """
+    print(f"\n{_DIV_THICK}")
+    print("🤖 AGENTE AUTÓNOMO - Modo Interactivo")
+    print(_DIV_THICK)
+    print("Escribe tu mensaje y presiona Enter.")
+    print("Escribe 'salir' o 'exit' para terminar.")
+    print(f"{_DIV_THICK}\n")
+    
+    cache = ResponseCache() if is_cache_enabled() else None
+    
+    # Evita renegociar los schemas de tools en cada sesión
+    with contextlib.suppress(Exception):
+        await restore_tool_schemas()
+    
+    # Precalentar el agente mientras el usuario escribe el primer mensaje
+    prewarm_task = asyncio.create_task(agente.prewarm())
+    
+    while True:
+        try:
+            # input() en un thread para no bloquear el event loop
+            mensaje = (await asyncio.to_thread(input, "👤 Tú: ")).strip()
+            
+            if not mensaje:
+                continue
+            
+            if mensaje.lower() in ["salir", "exit", "quit", "q"]:
+                print("\n👋 ¡Hasta luego!")
+                break
+            
+            print("⏳ Procesando...")
+            respuesta = await procesar_con_cache(
+                agente.procesar_sin_checkpoint, phone, mensaje, cache
+            )
+            if cache is not None:
+                cache.save()
+            
+            print(f"\n🤖 Agente: {respuesta}\n")
+            
+        except (KeyboardInterrupt, EOFError):
+            print("\n\n👋 ¡Hasta luego!")
+            break
+        except Exception as e:
+            print(f"\n❌ Error: {e}\n")
+    
+    if not prewarm_task.done():
+        prewarm_task.cancel()
@@ -16,6 +16,7 @@ MODO CODE PLANNER (nuevo):
 - El LLM genera código Python que invoca herramientas MCP
 - Fallback a especialistas si falla
 """
+import asyncio
 import json
 import logging
 from typing import Optional
@@ -40,7 +41,7 @@ from app.agents.states import (
 )
 from app.agents.specialists.financiero import FinancieroSubgraph
 from app.agents.specialists.administrativo import AdministrativoSubgraph
-from app.agents.specialists.institucional import InstitucionalSubgraph
+from app.agents.specialists.institucional import get_institucional_subgraph
 
 # Code Planner (nueva arquitectura)
 from app.agents.code_planner import CodePlannerAgent, get_code_planner_agent
@@ -104,7 +105,7 @@ class AgenteAutonomo:
         self.especialistas = {
             SpecialistType.FINANCIERO.value: FinancieroSubgraph(self.erp),
             SpecialistType.ADMINISTRATIVO.value: AdministrativoSubgraph(),
-            SpecialistType.INSTITUCIONAL.value: InstitucionalSubgraph(),
+            SpecialistType.INSTITUCIONAL.value: get_institucional_subgraph(),
         }
         
         # El grafo se construye de forma lazy
@@ -322,6 +323,9 @@ REGLAS:
 3. Reclamos, bajas, planes de pago → administrativo (crear ticket)
 4. Info del colegio (horarios, autoridades) → institucional
 5. Consultas mixtas pueden tener múltiples pasos
+6. "priority" ordena los pasos: usa números distintos y crecientes (1, 2, 3...)
+   si un paso depende de otro (ej: consultar y después crear un ticket).
+   Repite la misma priority SOLO en pasos independientes: pueden ejecutarse en paralelo
 
 Responde SOLO con JSON válido (sin markdown):
 {{
@@ -383,6 +387,35 @@ Si es saludo, steps debe ser lista vacía [].
         if idx >= len(steps):
             return state
         
+        # Pasos consecutivos con la misma prioridad no dependen entre sí:
+        # se despachan en paralelo. Sin prioridad explícita, de a uno
+        priority = steps[idx].get("priority")
+        end = idx + 1
+        if type(priority) is int:
+            while end < len(steps) and steps[end].get("priority") == priority:
+                end += 1
+        
+        reports = await asyncio.gather(*(
+            self._run_step(state, i, steps) for i in range(idx, end)
+        ))
+        
+        # Guardar reportes
+        if state.get("specialist_reports") is None:
+            state["specialist_reports"] = []
+        state["specialist_reports"].extend(reports)
+        
+        # Avanzar índice
+        state["current_step_index"] = end
+        
+        return state
+    
+    async def _run_step(
+        self,
+        state: AgentState,
+        idx: int,
+        steps: list[StepPlan]
+    ) -> SpecialistReport:
+        """Ejecuta un paso del MasterPlan con su especialista."""
         step = steps[idx]
         specialist_type = step.get("specialist", "")
         goal = step.get("goal", "")
@@ -394,7 +427,7 @@ Si es saludo, steps debe ser lista vacía [].
         especialista = self.especialistas.get(specialist_type)
         
         if not especialista:
-            report = SpecialistReport(
+            return SpecialistReport(
                 specialist=specialist_type,
                 success=False,
                 data={},
@@ -402,24 +435,14 @@ Si es saludo, steps debe ser lista vacía [].
                 error=f"Especialista no disponible: {specialist_type}",
                 requires_replan=True
             )
-        else:
-            # Ejecutar subgrafo del especialista
-            report = await especialista.run(
-                phone_number=state["phone_number"],
-                goal=goal,
-                params=params,
-                user_context=state.get("user_context")
-            )
-        
-        # Guardar reporte
-        if state.get("specialist_reports") is None:
-            state["specialist_reports"] = []
-        state["specialist_reports"].append(report)
-        
-        # Avanzar índice
-        state["current_step_index"] = idx + 1
         
-        return state
+        # Ejecutar subgrafo del especialista
+        return await especialista.run(
+            phone_number=state["phone_number"],
+            goal=goal,
+            params=params,
+            user_context=state.get("user_context")
+        )
     
     async def _nodo_evaluar(self, state: AgentState) -> AgentState:
         """
@@ -771,6 +794,47 @@ Respuesta:
                 "Por favor, intentá de nuevo."
             )
     
+    async def prewarm(self) -> None:
+        """
+        Inicializa de antemano lo que el primer mensaje necesitaría
+        (Code Planner y schemas de tools del MCP), sin invocar al LLM.
+        """
+        try:
+            if self.use_code_planner:
+                if self._code_planner is None:
+                    self._code_planner = get_code_planner_agent()
+                await self._code_planner.mcp.list_tools()
+        except Exception as e:
+            logger.debug(f"Prewarm incompleto: {e}")
+    
+    async def procesar_batch(
+        self,
+        items: list[tuple[str, str]],
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> list[str | BaseException]:
+        """
+        Procesa varios mensajes independientes sin checkpointing.
+        
+        Args:
+            items: Lista de (whatsapp, mensaje)
+            semaphore: Límite de mensajes en curso, compartido entre lotes
+                (cada mensaje ocupa un lugar solo mientras se procesa)
+            
+        Returns:
+            list: Respuestas en el mismo orden que los items; el error de
+            un item se devuelve en su lugar sin cortar al resto
+        """
+        async def _uno(whatsapp: str, mensaje: str) -> str:
+            if semaphore is None:
+                return await self.procesar_sin_checkpoint(whatsapp, mensaje)
+            async with semaphore:
+                return await self.procesar_sin_checkpoint(whatsapp, mensaje)
+        
+        return await asyncio.gather(
+            *(_uno(whatsapp, mensaje) for whatsapp, mensaje in items),
+            return_exceptions=True
+        )
+    
     async def _cargar_contexto_usuario(self, whatsapp: str) -> dict:
         """
         Carga el contexto del usuario desde el ERP.
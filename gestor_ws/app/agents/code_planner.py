@@ -211,6 +211,9 @@ REGLAS:
 1. Genera SOLO una función async llamada `execute(mcp, context)` que retorne un dict
 2. Usa `await mcp.call_tool("nombre_tool", {{"param": "valor"}})` para invocar tools
 3. El resultado de call_tool tiene: .success (bool), .data (dict/Any), .error (str/None)
+   Para varias tools independientes entre sí usa
+   `await mcp.call_tools_parallel([("tool_a", {{...}}), ("tool_b", {{...}})])`:
+   las ejecuta en paralelo y retorna la lista de resultados en el mismo orden
 4. La función debe retornar un dict con:
    - "success": bool
    - "data": datos obtenidos
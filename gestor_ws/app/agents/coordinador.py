@@ -412,4 +412,13 @@ Respuesta reformulada:
             return respuesta_admin  # Retorna original si falla
 
 
+# Singleton del agente coordinador (construir el grafo y el LLM es costoso)
+_agente_coordinador: Optional[AgenteAutonomo] = None
 
+
+def get_agente_coordinador() -> AgenteAutonomo:
+    """Obtiene la instancia compartida del agente coordinador."""
+    global _agente_coordinador
+    if _agente_coordinador is None:
+        _agente_coordinador = AgenteAutonomo()
+    return _agente_coordinador
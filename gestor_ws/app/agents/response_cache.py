@@ -0,0 +1,95 @@
+"""
+Cache de respuestas del agente para el script de pruebas.
+
+Evita repetir la llamada al LLM cuando se vuelve a ejecutar la suite
+con los mismos mensajes. Solo se activa con GESTOR_TEST_CACHE=1; no se
+usa en producción.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_ENV_VAR = "GESTOR_TEST_CACHE"
+DEFAULT_CACHE_PATH = Path("logs") / "resp_cache.json"
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAXSIZE = 500
+
+
+def is_cache_enabled() -> bool:
+    """Indica si el cache de respuestas está habilitado por variable de entorno."""
+    return os.getenv(CACHE_ENV_VAR) == "1"
+
+
+def make_key(phone: str, mensaje: str) -> str:
+    """Clave del cache: sha256 de teléfono + mensaje normalizado."""
+    raw = f"{phone}|{mensaje.strip().lower()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache LRU con TTL persistido en disco.
+
+    Las entradas guardan el timestamp de escritura (epoch) para que el
+    TTL siga siendo válido entre ejecuciones del script.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        maxsize: int = DEFAULT_MAXSIZE
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._load()
+
+    def _load(self) -> None:
+        """Carga el cache desde disco si existe."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for key, (timestamp, value) in json.load(f).items():
+                    self._data[key] = (timestamp, value)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el cache de respuestas: {e}")
+            self._data.clear()
+
+    def save(self) -> None:
+        """Persiste el cache en disco."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Obtiene una respuesta cacheada si existe y no expiró."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        timestamp, value = entry
+        if time.time() - timestamp > self.ttl_seconds:
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Guarda una respuesta, descartando la menos usada si está lleno."""
+        self._data[key] = (time.time(), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -3,6 +3,7 @@ Router de mensajes - Capa 1 (Sin LLM).
 Clasifica mensajes por keywords para decidir qué agente procesa.
 """
 import logging
+import re
 from enum import Enum
 from typing import Optional
 
@@ -72,8 +73,18 @@ class MessageRouter:
     
     def __init__(self):
         """Inicializa el router."""
+        # Un patrón compilado por grupo: una sola pasada sobre el texto
+        # en lugar de un `in` por keyword
+        self._pattern_escalamiento = self._compile_keywords(self.KEYWORDS_ESCALAMIENTO)
+        self._pattern_simple = self._compile_keywords(self.KEYWORDS_SIMPLE)
+        self._pattern_saludo = self._compile_keywords(self.KEYWORDS_SALUDO)
         logger.info("MessageRouter inicializado")
     
+    @staticmethod
+    def _compile_keywords(keywords: list[str]) -> re.Pattern:
+        """Compila una lista de keywords en una alternación de literales."""
+        return re.compile("|".join(re.escape(kw) for kw in keywords))
+    
     def route(self, message: str) -> RouteType:
         """
         Determina la ruta apropiada para un mensaje.
@@ -87,17 +98,17 @@ class MessageRouter:
         msg_lower = message.lower().strip()
         
         # Primero verificar escalamiento (prioridad)
-        if self._contains_keywords(msg_lower, self.KEYWORDS_ESCALAMIENTO):
+        if self._pattern_escalamiento.search(msg_lower):
             logger.info(f"Mensaje ruteado a AGENTE: '{message[:50]}...'")
             return RouteType.AGENTE
         
         # Verificar consultas simples
-        if self._contains_keywords(msg_lower, self.KEYWORDS_SIMPLE):
+        if self._pattern_simple.search(msg_lower):
             logger.info(f"Mensaje ruteado a ASISTENTE: '{message[:50]}...'")
             return RouteType.ASISTENTE
         
         # Verificar saludos (solo si es muy corto)
-        if len(msg_lower) < 30 and self._contains_keywords(msg_lower, self.KEYWORDS_SALUDO):
+        if len(msg_lower) < 30 and self._pattern_saludo.search(msg_lower):
             logger.info(f"Mensaje detectado como SALUDO: '{message[:50]}...'")
             return RouteType.SALUDO
         
@@ -105,10 +116,6 @@ class MessageRouter:
         logger.info(f"Mensaje ruteado a ASISTENTE (default): '{message[:50]}...'")
         return RouteType.ASISTENTE
     
-    def _contains_keywords(self, text: str, keywords: list[str]) -> bool:
-        """Verifica si el texto contiene alguna keyword."""
-        return any(kw in text for kw in keywords)
-    
     def get_route_info(self, message: str) -> dict:
         """
         Retorna información detallada sobre el ruteo.
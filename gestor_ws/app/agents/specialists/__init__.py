@@ -4,10 +4,14 @@ Subgrafos modulares para tareas específicas.
 """
 from app.agents.specialists.financiero import FinancieroSubgraph
 from app.agents.specialists.administrativo import AdministrativoSubgraph
-from app.agents.specialists.institucional import InstitucionalSubgraph
+from app.agents.specialists.institucional import (
+    InstitucionalSubgraph,
+    get_institucional_subgraph,
+)
 
 __all__ = [
     "FinancieroSubgraph",
     "AdministrativoSubgraph",
     "InstitucionalSubgraph",
+    "get_institucional_subgraph",
 ]
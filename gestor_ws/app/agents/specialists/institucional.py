@@ -2,17 +2,29 @@
 Especialista Institucional - Subgrafo para información del colegio.
 Maneja: horarios, calendario, autoridades, información general.
 
-NOTA: Este especialista usa un placeholder para la BD vectorial.
-La implementación completa se hará cuando la BD vectorial esté lista.
+NOTA: La búsqueda general usa la BD vectorial (pgvector) si
+VECTOR_STORE_ENABLED está activo; si no, hace matching por keywords.
 """
+import copy
 import json
 import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import cached_property
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage
 
 from app.llm.factory import get_llm, get_tracked_llm
+from app.llm.tracked_llm import TrackedLLM
+from app.services.vector_store import get_vector_store
 from app.agents.states import (
     SpecialistState,
     SpecialistReport,
@@ -26,6 +38,69 @@ from app.agents.states import (
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(obj, sort_keys: bool = False) -> str:
+    """Serializa a JSON (UTF-8, compacto) usando orjson si está disponible."""
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS if sort_keys else None
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def _json_loads(content: str):
+    """Parsea JSON usando orjson si está disponible."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Planes con hasta esta cantidad de acciones se ejecutan sin pasar por el grafo
+MAX_INLINE_ACTIONS = 2
+
+
+# ============================================================
+# CACHE DE PLANES
+# ============================================================
+
+PLAN_CACHE_MAXSIZE = 1024
+PLAN_CACHE_TTL_SECONDS = 3600
+
+# (goal normalizado, params canónicos) -> (timestamp, plan_data)
+_plan_cache: "OrderedDict[tuple[str, str], tuple[float, dict]]" = OrderedDict()
+
+
+def _plan_cache_key(goal: str, params: dict) -> tuple[str, str]:
+    """Clave del cache: meta normalizada + parámetros serializados en orden canónico."""
+    goal_key = unicodedata.normalize("NFKD", goal).lower().strip()
+    return goal_key, _json_dumps(params, sort_keys=True)
+
+
+def _plan_cache_get(key: tuple[str, str]) -> Optional[dict]:
+    """Obtiene un plan cacheado si existe y no expiró."""
+    entry = _plan_cache.get(key)
+    if entry is None:
+        return None
+    
+    timestamp, plan_data = entry
+    if time.monotonic() - timestamp > PLAN_CACHE_TTL_SECONDS:
+        del _plan_cache[key]
+        return None
+    
+    _plan_cache.move_to_end(key)
+    return copy.deepcopy(plan_data)
+
+
+def _plan_cache_set(key: tuple[str, str], plan_data: dict) -> None:
+    """Guarda un plan en el cache, descartando el menos usado si está lleno."""
+    _plan_cache[key] = (time.monotonic(), copy.deepcopy(plan_data))
+    _plan_cache.move_to_end(key)
+    if len(_plan_cache) > PLAN_CACHE_MAXSIZE:
+        _plan_cache.popitem(last=False)
+
+
 # ============================================================
 # DATOS MOCK - Reemplazar con BD Vectorial
 # ============================================================
@@ -81,13 +156,27 @@ class InstitucionalSubgraph:
     
     def __init__(self):
         """Inicializa el especialista institucional."""
-        # Usar TrackedLLM para tracking de tokens
-        self.llm = get_tracked_llm("institucional_planificar", "specialist")
         self.graph = self._build_graph()
         self.info_db = MOCK_INFO_INSTITUCIONAL  # Placeholder para BD vectorial
         
+        # Dispatch de herramientas: nombre -> (params, state) -> coroutine
+        self._tools = {
+            "buscar_horarios": lambda p, s: self._tool_buscar_horarios(p.get("nivel")),
+            "buscar_calendario": lambda p, s: self._tool_buscar_calendario(p.get("tipo")),
+            "buscar_autoridades": lambda p, s: self._tool_buscar_autoridades(p.get("cargo")),
+            "buscar_contacto": lambda p, s: self._tool_buscar_contacto(),
+            "buscar_info_general": lambda p, s: self._tool_buscar_info_general(
+                p.get("query", s["goal"])
+            ),
+        }
+        
         logger.info("InstitucionalSubgraph inicializado (modo mock)")
     
+    @cached_property
+    def llm(self) -> TrackedLLM:
+        """TrackedLLM del planificador, creado recién en el primer uso."""
+        return get_tracked_llm("institucional_planificar", "specialist")
+    
     def _build_graph(self) -> StateGraph:
         """Construye el subgrafo del especialista."""
         workflow = StateGraph(SpecialistState)
@@ -97,8 +186,15 @@ class InstitucionalSubgraph:
         workflow.add_node("ejecutar_accion", self._ejecutar_accion)
         workflow.add_node("generar_reporte", self._generar_reporte)
         
-        # Punto de entrada
-        workflow.set_entry_point("planificar")
+        # Punto de entrada: si el SubPlan ya viene resuelto (ver run),
+        # se saltea la planificación
+        workflow.set_conditional_entry_point(
+            self._punto_de_entrada,
+            {
+                "planificar": "planificar",
+                "ejecutar": "ejecutar_accion"
+            }
+        )
         
         # Edges
         workflow.add_edge("planificar", "ejecutar_accion")
@@ -125,14 +221,14 @@ class InstitucionalSubgraph:
 Tu tarea es planificar cómo resolver esta meta:
 
 META: {goal}
-PARÁMETROS: {json.dumps(params, ensure_ascii=False)}
+PARÁMETROS: {_json_dumps(params)}
 
 Herramientas disponibles:
 1. buscar_horarios - Busca horarios de clases (primaria/secundaria/administración)
 2. buscar_calendario - Busca fechas del calendario escolar
 3. buscar_autoridades - Busca información de autoridades del colegio
 4. buscar_contacto - Busca datos de contacto del colegio
-5. buscar_info_general - Búsqueda semántica de información general (placeholder)
+5. buscar_info_general - Búsqueda semántica de información general
 
 Responde SOLO con JSON válido (sin markdown):
 {{
@@ -144,9 +240,14 @@ Responde SOLO con JSON válido (sin markdown):
 """
         
         try:
-            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
-            content = self._clean_json_response(response.content)
-            plan_data = json.loads(content)
+            cache_key = _plan_cache_key(goal, params)
+            plan_data = _plan_cache_get(cache_key)
+            
+            if plan_data is None:
+                plan_data = await self._stream_plan(prompt)
+                _plan_cache_set(cache_key, plan_data)
+            else:
+                logger.debug("SubPlan institucional obtenido del cache")
             
             state["sub_plan"] = SubPlan(
                 specialist=SpecialistType.INSTITUCIONAL.value,
@@ -156,10 +257,10 @@ Responde SOLO con JSON válido (sin markdown):
             )
             state["current_action_index"] = 0
             
-            logger.info(f"SubPlan institucional: {len(plan_data.get('actions', []))} acciones")
+            logger.info("SubPlan institucional: %d acciones", len(plan_data.get("actions", [])))
             
         except Exception as e:
-            logger.error(f"Error planificando: {e}")
+            logger.error("Error planificando: %s", e)
             # Plan por defecto: búsqueda general
             state["sub_plan"] = SubPlan(
                 specialist=SpecialistType.INSTITUCIONAL.value,
@@ -177,6 +278,39 @@ Responde SOLO con JSON válido (sin markdown):
         
         return state
     
+    async def _stream_plan(self, prompt: str) -> dict:
+        """
+        Obtiene el plan del LLM en modo streaming.
+        
+        Corta la generación apenas se recibe un objeto JSON completo,
+        sin esperar el resto de la respuesta.
+        """
+        decoder = json.JSONDecoder()
+        buffer: list[str] = []
+        stream = self.llm.astream([HumanMessage(content=prompt)])
+        
+        try:
+            async for chunk in stream:
+                text = chunk.content if isinstance(chunk.content, str) else ""
+                buffer.append(text)
+                if "}" not in text:
+                    continue
+                
+                joined = "".join(buffer)
+                start = joined.find("{")
+                if start == -1:
+                    continue
+                try:
+                    plan_data, _ = decoder.raw_decode(joined, start)
+                    return plan_data
+                except json.JSONDecodeError:
+                    continue
+        finally:
+            await stream.aclose()
+        
+        # El stream terminó sin JSON decodificable de forma incremental
+        return _json_loads(self._clean_json_response("".join(buffer)))
+    
     async def _ejecutar_accion(self, state: SpecialistState) -> SpecialistState:
         """
         Ejecuta la acción actual del SubPlan.
@@ -196,43 +330,20 @@ Responde SOLO con JSON válido (sin markdown):
         tool_name = action.get("tool", "")
         params = action.get("params", {})
         
-        logger.info(f"Ejecutando acción {idx + 1}/{len(actions)}: {tool_name}")
+        logger.info("Ejecutando acción %d/%d: %s", idx + 1, len(actions), tool_name)
         
         result = {"tool": tool_name, "success": False, "data": None, "error": None}
         
         try:
-            if tool_name == "buscar_horarios":
-                result["data"] = await self._tool_buscar_horarios(
-                    params.get("nivel", None)
-                )
-                result["success"] = True
-                
-            elif tool_name == "buscar_calendario":
-                result["data"] = await self._tool_buscar_calendario(
-                    params.get("tipo", None)
-                )
-                result["success"] = True
-                
-            elif tool_name == "buscar_autoridades":
-                result["data"] = await self._tool_buscar_autoridades(
-                    params.get("cargo", None)
-                )
-                result["success"] = True
-                
-            elif tool_name == "buscar_contacto":
-                result["data"] = await self._tool_buscar_contacto()
-                result["success"] = True
-                
-            elif tool_name == "buscar_info_general":
-                result["data"] = await self._tool_buscar_info_general(
-                    params.get("query", state["goal"])
-                )
+            tool = self._tools.get(tool_name)
+            if tool is not None:
+                result["data"] = await tool(params, state)
                 result["success"] = True
             else:
                 result["error"] = f"Herramienta desconocida: {tool_name}"
                 
         except Exception as e:
-            logger.error(f"Error ejecutando {tool_name}: {e}")
+            logger.error("Error ejecutando %s: %s", tool_name, e)
             result["error"] = str(e)
         
         # Guardar resultado
@@ -245,6 +356,12 @@ Responde SOLO con JSON válido (sin markdown):
         
         return state
     
+    def _punto_de_entrada(self, state: SpecialistState) -> str:
+        """Decide si hay que planificar o si el SubPlan ya existe."""
+        if state.get("sub_plan"):
+            return "ejecutar"
+        return "planificar"
+    
     def _hay_mas_acciones(self, state: SpecialistState) -> str:
         """Decide si hay más acciones por ejecutar."""
         sub_plan = state.get("sub_plan")
@@ -365,9 +482,22 @@ Responde SOLO con JSON válido (sin markdown):
         """
         Búsqueda semántica de información general.
         
-        PLACEHOLDER: En el futuro, esto consultará la BD vectorial.
-        Por ahora, hace matching simple con keywords.
+        Consulta la BD vectorial si está habilitada. Si no lo está,
+        falla o no hay resultados, hace matching simple con keywords.
         """
+        vector_store = get_vector_store()
+        if vector_store is not None:
+            try:
+                fragmentos = await vector_store.search(query, k=5)
+                if fragmentos:
+                    return {
+                        "found": True,
+                        "query": query,
+                        "resultados": fragmentos
+                    }
+            except Exception as e:
+                logger.warning("Error en búsqueda vectorial, usando keywords: %s", e)
+        
         query_lower = query.lower()
         resultados = {}
         
@@ -523,7 +653,18 @@ Responde SOLO con JSON válido (sin markdown):
         )
         
         try:
-            result = await self.graph.ainvoke(initial_state)
+            await self._planificar(initial_state)
+            
+            # Planes cortos (el caso común): ejecutar inline sin el overhead
+            # del grafo. Los más largos continúan en el grafo sin replanificar.
+            if len(initial_state["sub_plan"]["actions"]) <= MAX_INLINE_ACTIONS:
+                while self._hay_mas_acciones(initial_state) == "continuar":
+                    await self._ejecutar_accion(initial_state)
+                await self._generar_reporte(initial_state)
+                result = initial_state
+            else:
+                result = await self.graph.ainvoke(initial_state)
+            
             return result.get("report") or create_specialist_report(
                 specialist=SpecialistType.INSTITUCIONAL.value,
                 success=False,
@@ -533,7 +674,7 @@ Responde SOLO con JSON válido (sin markdown):
                 requires_replan=True
             )
         except Exception as e:
-            logger.error(f"Error en InstitucionalSubgraph: {e}", exc_info=True)
+            logger.error("Error en InstitucionalSubgraph: %s", e, exc_info=True)
             return create_specialist_report(
                 specialist=SpecialistType.INSTITUCIONAL.value,
                 success=False,
@@ -542,3 +683,21 @@ Responde SOLO con JSON válido (sin markdown):
                 error=str(e),
                 requires_replan=True
             )
+
+
+# ============================================================
+# FACTORY
+# ============================================================
+
+_institucional_instance: Optional[InstitucionalSubgraph] = None
+
+
+def get_institucional_subgraph() -> InstitucionalSubgraph:
+    """
+    Factory para obtener el especialista institucional.
+    Usa patrón singleton: run() no guarda estado en la instancia.
+    """
+    global _institucional_instance
+    if _institucional_instance is None:
+        _institucional_instance = InstitucionalSubgraph()
+    return _institucional_instance
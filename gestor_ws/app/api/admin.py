@@ -1,29 +1,81 @@
 """
 API de administración para gestión de tickets.
 """
+import asyncio
 import logging
-from typing import Optional
+import os
+from typing import Literal, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
-from sqlalchemy import select, func
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Request, Response
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+from sqlalchemy import select, func, update
 
+from app.config import settings
 from app.database import async_session_maker
+from app.llm.factory import PROVIDERS, validate_llm_config
 from app.models.tickets import Ticket
 from app.schemas.tickets import (
     TicketResponse,
     TicketResolve,
     TicketListResponse
 )
-from app.agents.coordinador import AgenteAutonomo
+from app.agents.coordinador import get_agente_coordinador
 from app.services.whatsapp_service import get_whatsapp_service
 
 
 logger = logging.getLogger(__name__)
 
+# Detalle genérico para errores 500 (el error real queda en el log)
+ERROR_INTERNO = "Error interno del servidor"
+
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
+# Campos de TicketResponse, leídos directo del modelo ORM
+_TICKET_FIELDS = tuple(TicketResponse.model_fields)
+
+
+def _ticket_response(ticket: Ticket) -> TicketResponse:
+    """TicketResponse sin validar: los datos vienen de la BD, ya tipados."""
+    return TicketResponse.model_construct(
+        **{field: getattr(ticket, field) for field in _TICKET_FIELDS}
+    )
+
+
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serializa el schema y lo devuelve como Response.
+    
+    Al recibir una Response, FastAPI no re-valida el body contra
+    response_model (que queda solo para la documentación OpenAPI).
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+async def _fetch_tickets(query) -> list[Ticket]:
+    """Ejecuta la query paginada con cursor del servidor (lotes de 50 filas)."""
+    async with async_session_maker() as session:
+        result = await session.stream_scalars(query.execution_options(yield_per=50))
+        return [t async for t in result]
+
+
+async def _count_por_estado() -> dict[str, int]:
+    """Cuenta tickets por estado con una sola query agrupada."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Ticket.estado, func.count(Ticket.id)).group_by(Ticket.estado)
+        )
+        return {estado: cantidad for estado, cantidad in result.all()}
+
+
+async def _count_total(count_query) -> int:
+    """Cuenta los tickets que cumplen los filtros."""
+    async with async_session_maker() as session:
+        result = await session.execute(count_query)
+        return result.scalar()
+
 
 @router.get("/tickets", response_model=TicketListResponse)
 async def list_tickets(
@@ -37,59 +89,51 @@ async def list_tickets(
     Lista tickets con filtros opcionales.
     """
     try:
-        async with async_session_maker() as session:
-            # Query base
-            query = select(Ticket)
-            count_query = select(func.count(Ticket.id))
-            
-            # Aplicar filtros
-            if estado:
-                query = query.where(Ticket.estado == estado)
-                count_query = count_query.where(Ticket.estado == estado)
-            
-            if categoria:
-                query = query.where(Ticket.categoria == categoria)
-                count_query = count_query.where(Ticket.categoria == categoria)
-            
-            if prioridad:
-                query = query.where(Ticket.prioridad == prioridad)
-                count_query = count_query.where(Ticket.prioridad == prioridad)
-            
-            # Ordenar por fecha (más recientes primero)
-            query = query.order_by(Ticket.created_at.desc())
-            
-            # Paginación
-            query = query.offset(offset).limit(limit)
-            
-            # Ejecutar
-            result = await session.execute(query)
-            tickets = result.scalars().all()
-            
-            total_result = await session.execute(count_query)
-            total = total_result.scalar()
-            
-            # Contar por estado
-            pendientes = await session.execute(
-                select(func.count(Ticket.id)).where(Ticket.estado == "pendiente")
-            )
-            en_proceso = await session.execute(
-                select(func.count(Ticket.id)).where(Ticket.estado == "en_proceso")
-            )
-            resueltos = await session.execute(
-                select(func.count(Ticket.id)).where(Ticket.estado == "resuelto")
-            )
-            
-            return TicketListResponse(
-                tickets=[TicketResponse.model_validate(t) for t in tickets],
-                total=total,
-                pendientes=pendientes.scalar() or 0,
-                en_proceso=en_proceso.scalar() or 0,
-                resueltos=resueltos.scalar() or 0
-            )
-            
+        # Query base
+        query = select(Ticket)
+        count_query = select(func.count(Ticket.id))
+        
+        # Aplicar filtros
+        if estado:
+            query = query.where(Ticket.estado == estado)
+            count_query = count_query.where(Ticket.estado == estado)
+        
+        if categoria:
+            query = query.where(Ticket.categoria == categoria)
+            count_query = count_query.where(Ticket.categoria == categoria)
+        
+        if prioridad:
+            query = query.where(Ticket.prioridad == prioridad)
+            count_query = count_query.where(Ticket.prioridad == prioridad)
+        
+        # Ordenar por fecha (más recientes primero)
+        query = query.order_by(Ticket.created_at.desc())
+        
+        # Paginación
+        query = query.offset(offset).limit(limit)
+        
+        # Las queries son independientes: se ejecutan en paralelo, cada una
+        # en su propia sesión (AsyncSession no admite uso concurrente)
+        queries = [_fetch_tickets(query), _count_por_estado()]
+        if estado or categoria or prioridad:
+            queries.append(_count_total(count_query))
+        
+        tickets, counts, *resto = await asyncio.gather(*queries)
+        
+        # Sin filtros el total es la suma de los grupos
+        total = resto[0] if resto else sum(counts.values())
+        
+        return _json_response(TicketListResponse.model_construct(
+            tickets=[_ticket_response(t) for t in tickets],
+            total=total,
+            pendientes=counts.get("pendiente", 0),
+            en_proceso=counts.get("en_proceso", 0),
+            resueltos=counts.get("resuelto", 0)
+        ))
+        
     except Exception as e:
-        logger.error(f"Error listando tickets: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error listando tickets: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.get("/tickets/{ticket_id}", response_model=TicketResponse)
@@ -107,13 +151,13 @@ async def get_ticket(ticket_id: UUID):
             if not ticket:
                 raise HTTPException(status_code=404, detail="Ticket no encontrado")
             
-            return TicketResponse.model_validate(ticket)
+            return _json_response(_ticket_response(ticket))
             
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error obteniendo ticket: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error obteniendo ticket: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.put("/tickets/{ticket_id}/resolver")
@@ -129,24 +173,34 @@ async def resolver_ticket(
     """
     try:
         async with async_session_maker() as session:
+            # UPDATE ... RETURNING: valida, resuelve y trae el contexto en
+            # un solo round-trip (el WHERE evita resolver dos veces)
             result = await session.execute(
-                select(Ticket).where(Ticket.id == ticket_id)
+                update(Ticket)
+                .where(Ticket.id == ticket_id, Ticket.estado != "resuelto")
+                .values(
+                    estado="resuelto",
+                    respuesta_admin=data.respuesta,
+                    resolved_at=datetime.now(timezone.utc)
+                )
+                .returning(Ticket.contexto)
             )
-            ticket = result.scalar_one_or_none()
+            row = result.first()
             
-            if not ticket:
-                raise HTTPException(status_code=404, detail="Ticket no encontrado")
-            
-            if ticket.estado == "resuelto":
+            if row is None:
+                # Distinguir ticket inexistente de ticket ya resuelto
+                existe = await session.scalar(
+                    select(Ticket.id).where(Ticket.id == ticket_id)
+                )
+                if existe is None:
+                    raise HTTPException(status_code=404, detail="Ticket no encontrado")
                 raise HTTPException(status_code=400, detail="Ticket ya está resuelto")
             
-            # Resolver ticket
-            ticket.resolver(data.respuesta)
             await session.commit()
-            await session.refresh(ticket)
+            contexto = row.contexto
             
             # Enviar respuesta al padre (background)
-            phone_number = ticket.contexto.get("phone_number") if ticket.contexto else None
+            phone_number = contexto.get("phone_number") if contexto else None
             
             if phone_number:
                 background_tasks.add_task(
@@ -168,8 +222,8 @@ async def resolver_ticket(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error resolviendo ticket: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error resolviendo ticket: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.put("/tickets/{ticket_id}/estado")
@@ -189,18 +243,20 @@ async def cambiar_estado_ticket(
     
     try:
         async with async_session_maker() as session:
+            # Un solo UPDATE ... RETURNING en lugar de SELECT + UPDATE
             result = await session.execute(
-                select(Ticket).where(Ticket.id == ticket_id)
+                update(Ticket)
+                .where(Ticket.id == ticket_id)
+                .values(
+                    estado=estado,
+                    resolved_at=datetime.now(timezone.utc) if estado == "resuelto" else Ticket.resolved_at
+                )
+                .returning(Ticket.id)
             )
-            ticket = result.scalar_one_or_none()
             
-            if not ticket:
+            if result.first() is None:
                 raise HTTPException(status_code=404, detail="Ticket no encontrado")
             
-            ticket.estado = estado
-            if estado == "resuelto":
-                ticket.resolved_at = datetime.now()
-            
             await session.commit()
             
             return {
@@ -212,8 +268,8 @@ async def cambiar_estado_ticket(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error cambiando estado: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error cambiando estado: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.get("/stats")
@@ -223,33 +279,34 @@ async def get_stats():
     """
     try:
         async with async_session_maker() as session:
-            # Tickets por estado
-            tickets_stats = {}
-            for estado in ["pendiente", "en_proceso", "resuelto"]:
-                result = await session.execute(
-                    select(func.count(Ticket.id)).where(Ticket.estado == estado)
-                )
-                tickets_stats[estado] = result.scalar() or 0
-            
-            # Tickets por categoría
+            # Todos los conteos en un solo scan con COUNT(*) FILTER
+            estados = ["pendiente", "en_proceso", "resuelto"]
             categorias = ["plan_pago", "reclamo", "baja", "consulta_admin"]
-            categorias_stats = {}
-            for cat in categorias:
-                result = await session.execute(
-                    select(func.count(Ticket.id)).where(Ticket.categoria == cat)
-                )
-                categorias_stats[cat] = result.scalar() or 0
-            
-            # Tickets por prioridad (solo pendientes)
-            prioridades_stats = {}
-            for pri in ["baja", "media", "alta"]:
-                result = await session.execute(
-                    select(func.count(Ticket.id)).where(
+            prioridades = ["baja", "media", "alta"]
+            
+            query = select(
+                *[
+                    func.count(Ticket.id).filter(Ticket.estado == estado).label(f"estado_{estado}")
+                    for estado in estados
+                ],
+                *[
+                    func.count(Ticket.id).filter(Ticket.categoria == cat).label(f"categoria_{cat}")
+                    for cat in categorias
+                ],
+                *[
+                    # Tickets por prioridad (solo pendientes)
+                    func.count(Ticket.id).filter(
                         Ticket.prioridad == pri,
                         Ticket.estado == "pendiente"
-                    )
-                )
-                prioridades_stats[pri] = result.scalar() or 0
+                    ).label(f"prioridad_{pri}")
+                    for pri in prioridades
+                ],
+            )
+            row = (await session.execute(query)).one()._mapping
+            
+            tickets_stats = {estado: row[f"estado_{estado}"] for estado in estados}
+            categorias_stats = {cat: row[f"categoria_{cat}"] for cat in categorias}
+            prioridades_stats = {pri: row[f"prioridad_{pri}"] for pri in prioridades}
             
             return {
                 "tickets": {
@@ -261,8 +318,8 @@ async def get_stats():
             }
             
     except Exception as e:
-        logger.error(f"Error obteniendo stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error obteniendo stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 async def enviar_respuesta_ticket(
@@ -275,7 +332,7 @@ async def enviar_respuesta_ticket(
     """
     try:
         # Reformular usando LLM
-        agente = AgenteAutonomo()
+        agente = get_agente_coordinador()
         respuesta_reformulada = await agente.procesar_respuesta_admin(
             ticket_id,
             respuesta_admin,
@@ -294,11 +351,6 @@ async def enviar_respuesta_ticket(
 
 # ============== CONFIGURACION LLM ==============
 
-from app.config import settings
-from pydantic import BaseModel
-from typing import Literal
-
-
 class ConfigResponse(BaseModel):
     llm_provider: str
     llm_model: str
@@ -322,31 +374,43 @@ class TestLLMRequest(BaseModel):
     provider: Literal["openai", "google"]
 
 
+# La configuración solo cambia vía update_config, que invalida este cache
+_config_cache: Optional[ConfigResponse] = None
+
+
 @router.get("/config", response_model=ConfigResponse)
 async def get_config():
     """
     Retorna la configuración actual del sistema.
     """
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = _build_config_response()
+    return _config_cache
+
+
+def _build_config_response() -> ConfigResponse:
+    """Construye la respuesta de configuración a partir de settings."""
     return ConfigResponse(
         llm_provider=settings.LLM_PROVIDER,
         llm_model=settings.LLM_MODEL,
         llm_temperature=settings.LLM_TEMPERATURE,
         llm_max_tokens=settings.LLM_MAX_TOKENS,
-        openai_api_key_configured=bool(settings.OPENAI_API_KEY and len(settings.OPENAI_API_KEY) > 10),
-        google_api_key_configured=bool(settings.GOOGLE_API_KEY and len(settings.GOOGLE_API_KEY) > 10),
-        whatsapp_configured=bool(settings.WHATSAPP_TOKEN and not settings.WHATSAPP_TOKEN.startswith("dummy")),
+        openai_api_key_configured=settings.openai_api_key_configured,
+        google_api_key_configured=settings.google_api_key_configured,
+        whatsapp_configured=settings.whatsapp_configured,
     )
 
 
 @router.put("/config")
-async def update_config(config: ConfigUpdate):
+async def update_config(config: ConfigUpdate, request: Request):
     """
     Actualiza la configuración del sistema.
     
     NOTA: Los cambios se aplican en memoria. Para persistir,
     se deben guardar en .env o BD.
     """
-    import os
+    global _config_cache
     
     try:
         if config.llm_provider:
@@ -373,9 +437,11 @@ async def update_config(config: ConfigUpdate):
             os.environ['GOOGLE_API_KEY'] = config.google_api_key
             settings.GOOGLE_API_KEY = config.google_api_key
         
-        # Recargar LLM con nueva configuración
-        from app.llm.factory import get_llm, validate_llm_config
+        _config_cache = None
+        
+        # Recargar LLM con nueva configuración (sale del modo degradado)
         validate_llm_config()
+        request.app.state.llm_ready = True
         
         logger.info(f"Configuración actualizada: provider={settings.LLM_PROVIDER}, model={settings.LLM_MODEL}")
         
@@ -423,28 +489,18 @@ async def test_llm(data: TestLLMRequest):
     Prueba la conexión con el LLM del proveedor especificado.
     """
     try:
-        from app.llm.factory import get_llm
-        from langchain_core.messages import HumanMessage
+        # Instanciar el provider pedido sin tocar settings.LLM_PROVIDER:
+        # los requests concurrentes siguen viendo la configuración real
+        llm = PROVIDERS[data.provider]().get_llm()
+        response = await llm.ainvoke([HumanMessage(content="Di 'Hola' en una palabra")])
         
-        # Temporalmente cambiar provider para el test
-        original_provider = settings.LLM_PROVIDER
-        settings.LLM_PROVIDER = data.provider
+        return {
+            "success": True,
+            "provider": data.provider,
+            "model": settings.LLM_MODEL,
+            "response": response.content[:100] if response.content else "OK"
+        }
         
-        try:
-            llm = get_llm()
-            response = await llm.ainvoke([HumanMessage(content="Di 'Hola' en una palabra")])
-            
-            return {
-                "success": True,
-                "provider": data.provider,
-                "model": settings.LLM_MODEL,
-                "response": response.content[:100] if response.content else "OK"
-            }
-            
-        finally:
-            # Restaurar provider original
-            settings.LLM_PROVIDER = original_provider
-            
     except Exception as e:
         logger.error(f"Error probando LLM: {e}")
         return {
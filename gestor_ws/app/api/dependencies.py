@@ -0,0 +1,15 @@
+"""
+Dependencias compartidas por los routers.
+"""
+from fastapi import HTTPException, Request
+
+
+def require_llm(request: Request) -> None:
+    """
+    Rechaza con 503 los endpoints que necesitan el LLM cuando arrancó
+    en modo degradado (validate_llm_config falló en el lifespan).
+    
+    Si el lifespan no corrió (ej: TestClient sin `with`) se asume listo.
+    """
+    if not getattr(request.app.state, "llm_ready", True):
+        raise HTTPException(status_code=503, detail="LLM no disponible")
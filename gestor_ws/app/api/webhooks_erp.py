@@ -13,6 +13,9 @@ from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
 
+# Detalle genérico para errores 500 (el error real queda en el log)
+ERROR_INTERNO = "Error interno del servidor"
+
 router = APIRouter(prefix="/webhook/erp", tags=["Webhooks ERP"])
 
 # Servicios
@@ -63,8 +66,8 @@ async def webhook_pago_confirmado(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error procesando pago confirmado: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error procesando pago confirmado: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.post("/cuota-generada")
@@ -106,8 +109,8 @@ async def webhook_cuota_generada(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error procesando cuota generada: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error procesando cuota generada: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.post("/alumno-actualizado")
@@ -138,8 +141,8 @@ async def webhook_alumno_actualizado(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error procesando alumno actualizado: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error procesando alumno actualizado: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 @router.post("/responsable-actualizado")
@@ -170,8 +173,8 @@ async def webhook_responsable_actualizado(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error procesando responsable actualizado: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error procesando responsable actualizado: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=ERROR_INTERNO) from e
 
 
 
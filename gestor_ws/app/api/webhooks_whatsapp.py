@@ -4,13 +4,15 @@ Webhooks para recibir mensajes de WhatsApp.
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, Query, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Query, HTTPException, BackgroundTasks, Depends, Request
 
 from app.schemas.whatsapp import WhatsAppMessage, WebhookVerification
 from app.agents.router import MessageRouter, RouteType, get_saludo_response
 from app.agents.asistente import AsistenteVirtual
-from app.agents.coordinador import AgenteAutonomo
+from app.agents.coordinador import AgenteAutonomo, get_agente_coordinador
+from app.api.dependencies import require_llm
 from app.services.whatsapp_service import get_whatsapp_service
+from app.services.interaccion_writer import get_interaccion_writer
 from app.models.interacciones import Interaccion
 from app.database import async_session_maker
 from app.config import settings
@@ -20,10 +22,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/webhook", tags=["Webhooks WhatsApp"])
 
+# Respuesta cuando el mensaje necesita al LLM y la app está en modo degradado
+MENSAJE_LLM_NO_DISPONIBLE = (
+    "Disculpá, en este momento no puedo responder consultas. "
+    "Por favor, intentá de nuevo en unos minutos."
+)
+
 # Instancias de agentes (lazy loading)
 _router_service: Optional[MessageRouter] = None
 _asistente: Optional[AsistenteVirtual] = None
-_agente: Optional[AgenteAutonomo] = None
 
 
 def get_router_service() -> MessageRouter:
@@ -43,11 +50,8 @@ def get_asistente() -> AsistenteVirtual:
 
 
 def get_agente() -> AgenteAutonomo:
-    """Obtiene instancia del agente coordinador."""
-    global _agente
-    if _agente is None:
-        _agente = AgenteAutonomo()
-    return _agente
+    """Obtiene instancia del agente coordinador (compartida con admin)."""
+    return get_agente_coordinador()
 
 
 @router.get("/whatsapp")
@@ -71,34 +75,67 @@ async def webhook_verification(
 @router.post("/whatsapp")
 async def webhook_whatsapp(
     message: WhatsAppMessage,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    request: Request
 ):
     """
     Recibe mensajes de WhatsApp (formato simplificado para pruebas).
     
-    Flujo:
+    Responde de inmediato (Meta reintenta los webhooks lentos, y los que
+    fallan seguido los desactiva) y procesa el mensaje en background.
+    En modo degradado (sin LLM) también responde 200: los saludos se
+    atienden igual y el resto recibe MENSAJE_LLM_NO_DISPONIBLE.
+    
+    Pasos:
     1. Router clasifica el mensaje
     2. Asistente o Agente procesa según clasificación
     3. Se envía respuesta
     4. Se registra la interacción
     """
+    whatsapp_from = message.from_number
+    texto = message.text
+    
+    logger.info(f"Mensaje recibido de {whatsapp_from}: '{texto[:50]}...'")
+    
+    # El router es por keywords (sin LLM): se resuelve antes de responder
+    router_service = get_router_service()
+    ruta = router_service.route(texto)
+    
+    logger.info(f"Mensaje ruteado a: {ruta.value}")
+    
+    # Si el lifespan no corrió (ej: TestClient sin `with`) se asume listo
+    llm_ready = getattr(request.app.state, "llm_ready", True)
+    if not llm_ready and ruta != RouteType.SALUDO:
+        logger.warning(f"LLM no disponible: respuesta de contingencia a {whatsapp_from}")
+    
+    background_tasks.add_task(_process_whatsapp, whatsapp_from, texto, ruta, llm_ready)
+    
+    return {
+        "status": "ok",
+        "ruta": ruta.value
+    }
+
+
+async def _process_whatsapp(
+    whatsapp_from: str,
+    texto: str,
+    ruta: RouteType,
+    llm_ready: bool = True
+) -> None:
+    """
+    Procesa un mensaje ya ruteado: genera la respuesta, la envía y
+    registra la interacción.
+    """
     try:
-        whatsapp_from = message.from_number
-        texto = message.text
-        
-        logger.info(f"Mensaje recibido de {whatsapp_from}: '{texto[:50]}...'")
-        
-        # 1. Router decide la ruta
-        router_service = get_router_service()
-        ruta = router_service.route(texto)
-        
-        logger.info(f"Mensaje ruteado a: {ruta.value}")
-        
-        # 2. Procesar según ruta
+        # 1. Procesar según ruta
         if ruta == RouteType.SALUDO:
             respuesta = get_saludo_response()
             agente = "router"
         
+        elif not llm_ready:
+            respuesta = MENSAJE_LLM_NO_DISPONIBLE
+            agente = "sistema"
+        
         elif ruta == RouteType.ASISTENTE:
             asistente = get_asistente()
             respuesta = await asistente.responder(whatsapp_from, texto)
@@ -106,10 +143,6 @@ async def webhook_whatsapp(
             
             # Verificar si el asistente quiere escalar
             if respuesta.startswith("__ESCALAR__"):
-                parts = respuesta.split("|")
-                categoria = parts[1] if len(parts) > 1 else "consulta_admin"
-                motivo = parts[2] if len(parts) > 2 else texto
-                
                 agente_coord = get_agente()
                 respuesta = await agente_coord.procesar(whatsapp_from, texto)
                 agente = "coordinador"
@@ -119,25 +152,12 @@ async def webhook_whatsapp(
             respuesta = await agente_coord.procesar(whatsapp_from, texto)
             agente = "coordinador"
         
-        # 3. Enviar respuesta
+        # 2. Enviar respuesta
         whatsapp_service = get_whatsapp_service()
         await whatsapp_service.send_message(whatsapp_from, respuesta)
         
-        # 4. Registrar interacción (background)
-        background_tasks.add_task(
-            registrar_interaccion,
-            whatsapp_from,
-            texto,
-            respuesta,
-            agente
-        )
-        
-        return {
-            "status": "ok",
-            "ruta": ruta.value,
-            "agente": agente,
-            "respuesta_preview": respuesta[:100] + "..." if len(respuesta) > 100 else respuesta
-        }
+        # 3. Registrar interacción
+        await registrar_interaccion(whatsapp_from, texto, respuesta, agente)
         
     except Exception as e:
         logger.error(f"Error procesando mensaje: {e}", exc_info=True)
@@ -146,16 +166,14 @@ async def webhook_whatsapp(
         try:
             whatsapp_service = get_whatsapp_service()
             await whatsapp_service.send_message(
-                message.from_number,
+                whatsapp_from,
                 "Disculpá, tuve un problema. ¿Podés intentar de nuevo?"
             )
         except Exception:
             pass
-        
-        raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/whatsapp/test")
+@router.post("/whatsapp/test", dependencies=[Depends(require_llm)])
 async def test_message(
     message: WhatsAppMessage
 ):
@@ -209,22 +227,27 @@ async def registrar_interaccion(
     agente: str
 ) -> None:
     """Registra la interacción en la base de datos."""
+    # Con la app levantada, las interacciones se escriben en lote
+    writer = get_interaccion_writer()
+    if writer.running:
+        writer.registrar(whatsapp, mensaje_entrada, respuesta, agente)
+        return
+    
     try:
         async with async_session_maker() as session:
-            # Registrar mensaje entrante
-            interaccion_entrada = Interaccion.crear_mensaje_entrante(
-                whatsapp=whatsapp,
-                contenido=mensaje_entrada
-            )
-            session.add(interaccion_entrada)
-            
-            # Registrar respuesta
-            interaccion_respuesta = Interaccion.crear_respuesta_bot(
-                whatsapp=whatsapp,
-                contenido=respuesta,
-                agente=agente
-            )
-            session.add(interaccion_respuesta)
+            # Mensaje entrante + respuesta en un solo INSERT multi-values
+            # (ids generados en el cliente, sin defaults del servidor)
+            session.add_all([
+                Interaccion.crear_mensaje_entrante(
+                    whatsapp=whatsapp,
+                    contenido=mensaje_entrada
+                ),
+                Interaccion.crear_respuesta_bot(
+                    whatsapp=whatsapp,
+                    contenido=respuesta,
+                    agente=agente
+                ),
+            ])
             
             await session.commit()
             
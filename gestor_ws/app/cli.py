@@ -0,0 +1,72 @@
+"""
+Comandos de administración del Gestor WS.
+
+Uso:
+    python -m app.cli init-db        Crea las tablas definidas en los modelos
+                                     (y la tabla vectorial si VECTOR_STORE_ENABLED)
+    python -m app.cli ingest-info    Embebe y guarda la información institucional
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import init_db, close_db
+from app.http import close_shared_async_client
+from app.services.vector_store import (
+    InstitucionalVectorStore,
+    fragmentos_institucionales,
+)
+
+
+async def _init_db() -> None:
+    """Crea las tablas y cierra el pool."""
+    try:
+        await init_db()
+        if settings.VECTOR_STORE_ENABLED:
+            await InstitucionalVectorStore().create_schema()
+    finally:
+        await close_db()
+
+
+async def _ingest_info() -> None:
+    """Carga los fragmentos institucionales en la BD vectorial."""
+    from app.agents.specialists.institucional import MOCK_INFO_INSTITUCIONAL
+    
+    try:
+        store = InstitucionalVectorStore()
+        await store.create_schema()
+        await store.ingest(fragmentos_institucionales(MOCK_INFO_INSTITUCIONAL))
+    finally:
+        await close_shared_async_client()
+        await close_db()
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Comandos de administración del Gestor WS"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "init-db",
+        help="Crea las tablas de la base de datos (Base.metadata.create_all)"
+    )
+    subparsers.add_parser(
+        "ingest-info",
+        help="Embebe la información institucional y la guarda en la BD vectorial"
+    )
+    
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    
+    if args.command == "init-db":
+        asyncio.run(_init_db())
+    elif args.command == "ingest-info":
+        asyncio.run(_ingest_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -23,8 +23,12 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # PgBouncer en modo transacción no soporta prepared statements cacheados
+    connect_args={"statement_cache_size": 0} if settings.DB_PGBOUNCER else {}
 )
 
 # Session factory
@@ -44,30 +48,59 @@ class Base(DeclarativeBase):
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency que proporciona una sesión de base de datos.
+    Dependency para endpoints de escritura.
+    Abre una transacción que se confirma al terminar (rollback si falla).
     Se usa con FastAPI Depends().
     """
+    async with async_session_maker.begin() as session:
+        yield session
+
+
+async def get_readonly_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency para endpoints de solo lectura.
+    No hace COMMIT: la conexión vuelve al pool al cerrar la sesión.
+    """
     async with async_session_maker() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+        yield session
+
+
+# Límite por defecto de conexiones en PostgreSQL (max_connections)
+POSTGRES_MAX_CONNECTIONS = 100
+
+
+def log_pool_config() -> None:
+    """
+    Informa el tamaño del pool y avisa si, sumando todos los workers,
+    se puede superar max_connections de PostgreSQL.
+    """
+    por_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    total = por_worker * settings.WEB_CONCURRENCY
+    
+    logger.info(
+        f"Pool de BD: {settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW} overflow "
+        f"= {por_worker} conexiones por worker (timeout={settings.DB_POOL_TIMEOUT}s)"
+    )
+    if total > POSTGRES_MAX_CONNECTIONS:
+        logger.warning(
+            f"El pool puede abrir {total} conexiones con {settings.WEB_CONCURRENCY} workers "
+            f"(> {POSTGRES_MAX_CONNECTIONS} de max_connections por defecto)"
+        )
 
 
 async def init_db() -> None:
     """
     Inicializa la base de datos.
     Crea todas las tablas definidas en los modelos.
+    
+    Se ejecuta con `python -m app.cli init-db`, o al arrancar la app
+    si AUTO_CREATE_TABLES está activo.
     """
     logger.info("Inicializando base de datos...")
     
     async with engine.begin() as conn:
         # Importar modelos para que se registren en Base.metadata
-        from app.models import cache, interacciones, tickets  # noqa
+        from app.models import cache, interacciones, tickets, token_usage  # noqa
         
         # Crear tablas
         await conn.run_sync(Base.metadata.create_all)
@@ -99,21 +132,21 @@ CREATE_TABLES_SQL = """
 CREATE TABLE IF NOT EXISTS cache_responsables (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     erp_responsable_id VARCHAR(100) UNIQUE NOT NULL,
-    nombre VARCHAR(200),
-    apellido VARCHAR(200),
-    whatsapp VARCHAR(20) UNIQUE,
-    email VARCHAR(200),
-    ultima_sync TIMESTAMP DEFAULT NOW()
+    nombre TEXT,
+    apellido TEXT,
+    whatsapp BIGINT UNIQUE,
+    email TEXT,
+    ultima_sync TIMESTAMPTZ DEFAULT NOW()
 );
 
 CREATE TABLE IF NOT EXISTS cache_alumnos (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     erp_alumno_id VARCHAR(100) UNIQUE NOT NULL,
-    nombre VARCHAR(200),
-    apellido VARCHAR(200),
-    grado VARCHAR(100),
+    nombre TEXT,
+    apellido TEXT,
+    grado TEXT,
     erp_responsable_id VARCHAR(100),
-    ultima_sync TIMESTAMP DEFAULT NOW()
+    ultima_sync TIMESTAMPTZ DEFAULT NOW()
 );
 
 CREATE TABLE IF NOT EXISTS cache_cuotas (
@@ -124,55 +157,160 @@ CREATE TABLE IF NOT EXISTS cache_cuotas (
     fecha_vencimiento DATE,
     estado VARCHAR(50),
     link_pago TEXT,
-    fecha_pago TIMESTAMP,
-    ultima_sync TIMESTAMP DEFAULT NOW()
+    fecha_pago TIMESTAMPTZ,
+    ultima_sync TIMESTAMPTZ DEFAULT NOW()
 );
 
+CREATE INDEX IF NOT EXISTS ix_cache_cuotas_erp_alumno_id ON cache_cuotas (erp_alumno_id);
+CREATE INDEX IF NOT EXISTS ix_cache_cuotas_estado_vencimiento
+    ON cache_cuotas (estado, fecha_vencimiento);
+CREATE INDEX IF NOT EXISTS ix_cache_cuotas_impagas_vencimiento
+    ON cache_cuotas (fecha_vencimiento) WHERE estado <> 'pagada';
+
 -- DATOS PROPIOS del Gestor WS
 CREATE TABLE IF NOT EXISTS interacciones (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    whatsapp_from VARCHAR(20) NOT NULL,
+    whatsapp_from BIGINT NOT NULL,
     erp_alumno_id VARCHAR(100),
     erp_cuota_id VARCHAR(100),
     tipo VARCHAR(50),
     contenido TEXT,
     agente VARCHAR(20),
-    metadata JSONB,
-    timestamp TIMESTAMP DEFAULT NOW()
+    meta JSONB NOT NULL DEFAULT '{}'::jsonb,
+    timestamp TIMESTAMPTZ DEFAULT NOW()
 );
 
+CREATE INDEX IF NOT EXISTS ix_interacciones_whatsapp_timestamp
+    ON interacciones (whatsapp_from, timestamp DESC);
+CREATE INDEX IF NOT EXISTS ix_interacciones_erp_alumno_id ON interacciones (erp_alumno_id);
+CREATE INDEX IF NOT EXISTS ix_interacciones_meta_gin
+    ON interacciones USING GIN (meta jsonb_path_ops);
+
 CREATE TABLE IF NOT EXISTS tickets (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     erp_alumno_id VARCHAR(100) NOT NULL,
     erp_responsable_id VARCHAR(100),
     categoria VARCHAR(50),
     motivo TEXT,
-    contexto JSONB,
+    contexto JSONB NOT NULL DEFAULT '{}'::jsonb,
     estado VARCHAR(20) DEFAULT 'pendiente',
     prioridad VARCHAR(20) DEFAULT 'media',
     respuesta_admin TEXT,
-    created_at TIMESTAMP DEFAULT NOW(),
-    resolved_at TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    resolved_at TIMESTAMPTZ
 );
 
+-- En tablas existentes con datos, crear con CREATE INDEX CONCURRENTLY
+CREATE INDEX IF NOT EXISTS ix_tickets_estado_created
+    ON tickets (estado, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_tickets_pendientes
+    ON tickets (created_at DESC) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS ix_tickets_categoria ON tickets (categoria);
+CREATE INDEX IF NOT EXISTS ix_tickets_prioridad_pendientes
+    ON tickets (prioridad) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS ix_tickets_contexto_gin
+    ON tickets USING GIN (contexto jsonb_path_ops);
+
 CREATE TABLE IF NOT EXISTS notificaciones_enviadas (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     erp_cuota_id VARCHAR(100) NOT NULL,
-    whatsapp_to VARCHAR(20),
+    whatsapp_to BIGINT,
     tipo VARCHAR(50),
-    fecha_envio TIMESTAMP DEFAULT NOW(),
+    fecha_envio TIMESTAMPTZ DEFAULT NOW(),
     leido BOOLEAN DEFAULT FALSE
 );
 
+CREATE INDEX IF NOT EXISTS ix_notificaciones_cuota_fecha
+    ON notificaciones_enviadas (erp_cuota_id, fecha_envio DESC);
+
 CREATE TABLE IF NOT EXISTS sincronizaciones_log (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     tipo VARCHAR(50),
     erp_id VARCHAR(100),
     accion VARCHAR(20),
-    timestamp TIMESTAMP DEFAULT NOW(),
-    payload JSONB
+    timestamp TIMESTAMPTZ DEFAULT NOW(),
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb
 );
+
+CREATE INDEX IF NOT EXISTS ix_sincronizaciones_log_payload_gin
+    ON sincronizaciones_log USING GIN (payload jsonb_path_ops);
 """
 
 
+# Migración de tablas existentes (creadas con create_all antes de TIMESTAMPTZ):
+# renombra interacciones.extra_data y pasa los timestamps a TIMESTAMPTZ.
+# Los valores naive se guardaron con la hora del servidor (UTC).
+# Correr antes que las demás migraciones (la de JSONB usa `meta`).
+MIGRATE_TIMESTAMPTZ_SQL = """
+ALTER TABLE interacciones RENAME COLUMN extra_data TO meta;
+ALTER TABLE cache_responsables
+    ALTER COLUMN ultima_sync TYPE TIMESTAMPTZ USING ultima_sync AT TIME ZONE 'UTC';
+ALTER TABLE cache_alumnos
+    ALTER COLUMN ultima_sync TYPE TIMESTAMPTZ USING ultima_sync AT TIME ZONE 'UTC';
+ALTER TABLE cache_cuotas
+    ALTER COLUMN fecha_pago TYPE TIMESTAMPTZ USING fecha_pago AT TIME ZONE 'UTC',
+    ALTER COLUMN ultima_sync TYPE TIMESTAMPTZ USING ultima_sync AT TIME ZONE 'UTC';
+ALTER TABLE interacciones
+    ALTER COLUMN timestamp TYPE TIMESTAMPTZ USING timestamp AT TIME ZONE 'UTC';
+ALTER TABLE tickets
+    ALTER COLUMN created_at TYPE TIMESTAMPTZ USING created_at AT TIME ZONE 'UTC',
+    ALTER COLUMN resolved_at TYPE TIMESTAMPTZ USING resolved_at AT TIME ZONE 'UTC';
+ALTER TABLE notificaciones_enviadas
+    ALTER COLUMN fecha_envio TYPE TIMESTAMPTZ USING fecha_envio AT TIME ZONE 'UTC';
+ALTER TABLE sincronizaciones_log
+    ALTER COLUMN timestamp TYPE TIMESTAMPTZ USING timestamp AT TIME ZONE 'UTC';
+"""
+
 
+# Migración de tablas existentes: números de WhatsApp de VARCHAR a BIGINT.
+# Los valores sin dígitos ("" o texto) quedan en NULL; en las columnas
+# NOT NULL (interacciones, token_usage) esas filas no identifican a nadie
+# y se borran antes del ALTER
+MIGRATE_PHONES_TO_BIGINT_SQL = """
+ALTER TABLE cache_responsables
+    ALTER COLUMN whatsapp TYPE BIGINT
+    USING NULLIF(regexp_replace(whatsapp, '\\D', '', 'g'), '')::bigint;
+DELETE FROM interacciones
+    WHERE NULLIF(regexp_replace(whatsapp_from, '\\D', '', 'g'), '') IS NULL;
+ALTER TABLE interacciones
+    ALTER COLUMN whatsapp_from TYPE BIGINT
+    USING NULLIF(regexp_replace(whatsapp_from, '\\D', '', 'g'), '')::bigint;
+ALTER TABLE notificaciones_enviadas
+    ALTER COLUMN whatsapp_to TYPE BIGINT
+    USING NULLIF(regexp_replace(whatsapp_to, '\\D', '', 'g'), '')::bigint;
+DELETE FROM token_usage
+    WHERE NULLIF(regexp_replace(whatsapp, '\\D', '', 'g'), '') IS NULL;
+ALTER TABLE token_usage
+    ALTER COLUMN whatsapp TYPE BIGINT
+    USING NULLIF(regexp_replace(whatsapp, '\\D', '', 'g'), '')::bigint;
+"""
+
+
+# Migración de tablas existentes: token_usage.inferences_json de JSON a JSONB
+# (JSON se guarda como texto y no admite índices GIN).
+# En tablas con datos, crear el índice con CREATE INDEX CONCURRENTLY
+MIGRATE_TOKEN_USAGE_JSONB_SQL = """
+ALTER TABLE token_usage
+    ALTER COLUMN inferences_json TYPE JSONB USING inferences_json::jsonb;
+CREATE INDEX IF NOT EXISTS ix_token_usage_inferences_gin
+    ON token_usage USING GIN (inferences_json jsonb_path_ops);
+"""
+
+
+# Migración de tablas existentes: JSONB con default '{}' ('[]' en los
+# arrays) en lugar de NULL
+MIGRATE_JSONB_DEFAULTS_SQL = """
+UPDATE interacciones SET meta = '{}'::jsonb WHERE meta IS NULL;
+ALTER TABLE interacciones
+    ALTER COLUMN meta SET DEFAULT '{}'::jsonb, ALTER COLUMN meta SET NOT NULL;
+UPDATE tickets SET contexto = '{}'::jsonb WHERE contexto IS NULL;
+ALTER TABLE tickets
+    ALTER COLUMN contexto SET DEFAULT '{}'::jsonb, ALTER COLUMN contexto SET NOT NULL;
+UPDATE sincronizaciones_log SET payload = '{}'::jsonb WHERE payload IS NULL;
+ALTER TABLE sincronizaciones_log
+    ALTER COLUMN payload SET DEFAULT '{}'::jsonb, ALTER COLUMN payload SET NOT NULL;
+UPDATE token_usage SET inferences_json = '[]'::jsonb WHERE inferences_json IS NULL;
+ALTER TABLE token_usage
+    ALTER COLUMN inferences_json SET DEFAULT '[]'::jsonb,
+    ALTER COLUMN inferences_json SET NOT NULL;
+"""
@@ -0,0 +1,56 @@
+"""
+Cliente HTTP compartido por el proceso.
+
+Un único pool de conexiones keep-alive para los clientes que no
+necesitan uno propio (hoy, el cliente MCP y los embeddings del vector
+store): evita pools duplicados y concentra el ajuste de límites en un
+solo lugar. Sin base_url: cada cliente arma URLs absolutas.
+"""
+import importlib.util
+import threading
+from typing import Optional
+
+import httpx
+
+
+# HTTP/2 requiere el extra httpx[http2] (paquete h2). httpx lo negocia
+# por ALPN: solo se usa contra servidores https que soporten HTTP/2
+# (uvicorn solo habla HTTP/1.1; hace falta un proxy delante)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+SHARED_TIMEOUT = httpx.Timeout(30.0, connect=2.0)
+
+
+_SHARED: Optional[httpx.AsyncClient] = None
+# get_shared_async_client es sync y puede llamarse desde threads (ej: scripts)
+_shared_lock = threading.Lock()
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """Obtiene el cliente HTTP compartido (lo crea al primer uso)."""
+    global _SHARED
+    if _SHARED is None or _SHARED.is_closed:
+        with _shared_lock:
+            if _SHARED is None or _SHARED.is_closed:
+                # Con transport explícito, limits y http2 se configuran en él
+                _SHARED = httpx.AsyncClient(
+                    timeout=SHARED_TIMEOUT,
+                    transport=httpx.AsyncHTTPTransport(
+                        retries=2,  # Reintenta solo errores de conexión
+                        http2=HTTP2_AVAILABLE,
+                        limits=httpx.Limits(
+                            max_connections=1000,
+                            max_keepalive_connections=100,
+                            keepalive_expiry=30.0
+                        )
+                    )
+                )
+    return _SHARED
+
+
+async def close_shared_async_client() -> None:
+    """Cierra el cliente HTTP compartido."""
+    global _SHARED
+    if _SHARED is not None:
+        await _SHARED.aclose()
+        _SHARED = None
@@ -2,11 +2,11 @@
 LLM Factory - Crea instancias de LLM según configuración.
 Soporta OpenAI (GPT-4, GPT-4o) y Google (Gemini Pro, Gemini Flash).
 """
+import importlib
 import logging
-from typing import Type
+from functools import lru_cache
+from typing import Optional, Type
 
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.language_models import BaseChatModel
 
 from app.config import settings
@@ -17,6 +17,29 @@ from app.llm.tracked_llm import TrackedLLM
 logger = logging.getLogger(__name__)
 
 
+# Clases de chat por proveedor. Se importan de forma lazy: cada SDK arrastra
+# un árbol de dependencias grande y solo se usa el proveedor configurado.
+_PROVIDER_CLASSES = {
+    "ChatOpenAI": "langchain_openai",
+    "ChatGoogleGenerativeAI": "langchain_google_genai",
+}
+
+
+def _load_provider_class(name: str) -> Type[BaseChatModel]:
+    """Importa (una sola vez) la clase de chat de un proveedor."""
+    cls = globals().get(name)
+    if cls is None:
+        cls = getattr(importlib.import_module(_PROVIDER_CLASSES[name]), name)
+        globals()[name] = cls
+    return cls
+
+
+def __getattr__(name: str):
+    if name in _PROVIDER_CLASSES:
+        return _load_provider_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class OpenAIProvider(LLMInterface):
     """
     Proveedor OpenAI (GPT-4, GPT-4o, GPT-4-turbo, etc.)
@@ -41,10 +64,11 @@ class OpenAIProvider(LLMInterface):
             )
         return True
     
-    def get_llm(self) -> ChatOpenAI:
+    def get_llm(self) -> BaseChatModel:
         """Retorna instancia de ChatOpenAI configurada."""
         self.validate_config()
         
+        ChatOpenAI = _load_provider_class("ChatOpenAI")
         return ChatOpenAI(
             model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
@@ -77,10 +101,11 @@ class GoogleProvider(LLMInterface):
             )
         return True
     
-    def get_llm(self) -> ChatGoogleGenerativeAI:
+    def get_llm(self) -> BaseChatModel:
         """Retorna instancia de ChatGoogleGenerativeAI configurada."""
         self.validate_config()
         
+        ChatGoogleGenerativeAI = _load_provider_class("ChatGoogleGenerativeAI")
         return ChatGoogleGenerativeAI(
             model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
@@ -101,7 +126,8 @@ def get_llm() -> BaseChatModel:
     Factory que retorna el LLM configurado según LLM_PROVIDER.
     
     Lee la configuración de settings y retorna la instancia
-    apropiada (OpenAI o Google Gemini).
+    apropiada (OpenAI o Google Gemini). La instancia se comparte
+    mientras la configuración no cambie.
     
     Returns:
         BaseChatModel: Instancia del LLM configurado
@@ -113,23 +139,45 @@ def get_llm() -> BaseChatModel:
         llm = get_llm()  # Retorna OpenAI o Google según .env
         response = await llm.ainvoke("Hola!")
     """
-    provider_class = PROVIDERS.get(settings.LLM_PROVIDER)
-    
-    if not provider_class:
+    if settings.LLM_PROVIDER not in PROVIDERS:
         available = list(PROVIDERS.keys())
         raise ValueError(
             f"LLM_PROVIDER '{settings.LLM_PROVIDER}' no válido. "
             f"Opciones disponibles: {available}"
         )
     
-    provider = provider_class()
+    return _get_cached_llm(
+        settings.LLM_PROVIDER,
+        settings.LLM_MODEL,
+        settings.LLM_TEMPERATURE,
+        settings.LLM_MAX_TOKENS,
+        settings.OPENAI_API_KEY,
+        settings.GOOGLE_API_KEY
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_cached_llm(
+    provider_name: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    openai_api_key: Optional[str],
+    google_api_key: Optional[str]
+) -> BaseChatModel:
+    """
+    Crea el LLM una vez por configuración y lo reutiliza (con su pool
+    de conexiones HTTP). Los argumentos solo forman la clave del cache:
+    si update_config cambia la configuración, se crea una instancia nueva.
+    """
+    provider = PROVIDERS[provider_name]()
     return provider.get_llm()
 
 
 def validate_llm_config() -> BaseChatModel:
     """
     Valida configuración LLM al iniciar la aplicación.
-    Imprime información de diagnóstico y retorna el LLM si es válido.
+    Registra la configuración en una línea de log y retorna el LLM si es válido.
     
     Returns:
         BaseChatModel: Instancia del LLM si la configuración es válida
@@ -137,27 +185,22 @@ def validate_llm_config() -> BaseChatModel:
     Raises:
         ValueError: Si hay errores de configuración
     """
-    print("🤖 Configurando LLM...")
-    print(f"   Provider: {settings.LLM_PROVIDER}")
-    print(f"   Model: {settings.LLM_MODEL}")
-    print(f"   Temperature: {settings.LLM_TEMPERATURE}")
-    print(f"   Max Tokens: {settings.LLM_MAX_TOKENS}")
+    cfg = {
+        "provider": settings.LLM_PROVIDER,
+        "model": settings.LLM_MODEL,
+        "temperature": settings.LLM_TEMPERATURE,
+        "max_tokens": settings.LLM_MAX_TOKENS,
+    }
     
     try:
         llm = get_llm()
-        print("   ✅ LLM configurado correctamente")
-        logger.info(
-            f"LLM configurado: provider={settings.LLM_PROVIDER}, "
-            f"model={settings.LLM_MODEL}"
-        )
+        logger.info(f"🤖 LLM configurado: {cfg}")
         return llm
     except ValueError as e:
-        print(f"   ❌ Error en configuración LLM: {e}")
-        logger.error(f"Error configurando LLM: {e}")
+        logger.error(f"❌ Error en configuración LLM {cfg}: {e}")
         raise
     except Exception as e:
-        print(f"   ❌ Error inesperado: {e}")
-        logger.error(f"Error inesperado configurando LLM: {e}")
+        logger.exception(f"❌ Error inesperado configurando LLM {cfg}: {e}")
         raise
 
 
@@ -167,14 +210,37 @@ def get_provider_info() -> dict:
     Útil para endpoints de health/status.
     
     Returns:
-        dict: Información del provider configurado
+        dict: Información del provider configurado (compartido, no modificar)
+    """
+    return _get_cached_provider_info(
+        settings.LLM_PROVIDER,
+        settings.LLM_MODEL,
+        settings.LLM_TEMPERATURE,
+        settings.LLM_MAX_TOKENS
+    )
+
+
+# Los providers no cambian en runtime
+_AVAILABLE_PROVIDERS = tuple(PROVIDERS)
+
+
+@lru_cache(maxsize=1)
+def _get_cached_provider_info(
+    provider_name: str,
+    model: str,
+    temperature: float,
+    max_tokens: int
+) -> dict:
+    """
+    Arma el dict una vez por configuración. La configuración puede
+    cambiar con update_config, por eso forma la clave del cache.
     """
     return {
-        "provider": settings.LLM_PROVIDER,
-        "model": settings.LLM_MODEL,
-        "temperature": settings.LLM_TEMPERATURE,
-        "max_tokens": settings.LLM_MAX_TOKENS,
-        "available_providers": list(PROVIDERS.keys())
+        "provider": provider_name,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "available_providers": _AVAILABLE_PROVIDERS
     }
 
 
@@ -2,12 +2,13 @@
 TrackedLLM - Wrapper que intercepta llamadas LLM para tracking de tokens.
 """
 import logging
-from typing import Any, Optional, Dict, List
+from typing import Any, AsyncIterator, Optional, Dict, List
 from datetime import datetime
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import LLMResult, ChatGeneration
+from pydantic import ConfigDict
 
 from app.services.token_tracker import token_tracker
 from app.config import settings
@@ -15,6 +16,41 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+# Encoders de tiktoken por modelo (crearlos es costoso: se hace una vez)
+_ENCODER_CACHE: Dict[str, Any] = {}
+
+
+def _get_encoder(model_name: str) -> Any:
+    """
+    Retorna el encoder de tiktoken para un modelo, importando tiktoken
+    solo la primera vez que hace falta.
+    
+    Raises:
+        ImportError: Si tiktoken no está instalado
+    """
+    encoding = _ENCODER_CACHE.get(model_name)
+    if encoding is None:
+        import tiktoken
+        
+        if "gpt-4" in model_name or "gpt-3.5" in model_name:
+            encoding = tiktoken.encoding_for_model(model_name)
+        else:
+            # Gemini y default: cl100k_base (mismo que GPT-3.5)
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _ENCODER_CACHE[model_name] = encoding
+    return encoding
+
+
+def _prompt_text(prompt: List[BaseMessage] | str) -> str:
+    """Texto de la entrada del LLM (mensajes concatenados)."""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(
+        m.content if isinstance(m.content, str) else str(m.content)
+        for m in prompt
+    )
+
+
 class TrackedLLM(BaseChatModel):
     """
     Wrapper que envuelve un LLM base y captura tokens automáticamente.
@@ -22,6 +58,14 @@ class TrackedLLM(BaseChatModel):
     Intercepta ainvoke() e invoke() para registrar tokens en TokenTracker.
     """
     
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    llm: BaseChatModel
+    node_name: str
+    inference_type: str = "general"
+    provider: str
+    model: str
+    
     def __init__(
         self,
         llm: BaseChatModel,
@@ -36,16 +80,14 @@ class TrackedLLM(BaseChatModel):
             node_name: Nombre del nodo (ej: "manager", "financiero_planificar")
             inference_type: Tipo de inferencia (ej: "planning", "synthesis")
         """
-        # Llamar a super().__init__() sin argumentos para BaseChatModel
-        super().__init__()
-        # Asignar atributos usando object.__setattr__ para evitar validación de Pydantic
-        object.__setattr__(self, 'llm', llm)
-        object.__setattr__(self, 'node_name', node_name)
-        object.__setattr__(self, 'inference_type', inference_type)
-        
-        # Extraer provider y model del LLM base
-        object.__setattr__(self, 'provider', settings.LLM_PROVIDER)
-        object.__setattr__(self, 'model', settings.LLM_MODEL)
+        # Provider y model se toman de la configuración activa
+        super().__init__(
+            llm=llm,
+            node_name=node_name,
+            inference_type=inference_type,
+            provider=settings.LLM_PROVIDER,
+            model=settings.LLM_MODEL
+        )
     
     @property
     def _llm_type(self) -> str:
@@ -54,74 +96,75 @@ class TrackedLLM(BaseChatModel):
     
     def _extract_token_usage(
         self,
-        response: Any
+        response: Any,
+        prompt: Optional[List[BaseMessage] | str] = None
     ) -> tuple[int, int, int]:
         """
         Extrae tokens de la respuesta del LLM.
         
+        Lee primero el formato nativo del provider activo y después el
+        `usage_metadata` estándar. tiktoken solo se usa si
+        TOKEN_FALLBACK_ENABLED está activo, o siempre que se pase `prompt`
+        (stream cerrado antes de recibir el usage), y la respuesta tiene
+        contenido.
+        
         Args:
             response: Respuesta del LLM (AIMessage o similar)
+            prompt: Entrada del LLM, para estimar también los prompt tokens
         
         Returns:
             tuple: (prompt_tokens, completion_tokens, total_tokens)
         """
-        prompt_tokens = 0
-        completion_tokens = 0
-        total_tokens = 0
-        
-        # Intentar extraer de response_metadata (OpenAI)
-        if hasattr(response, 'response_metadata'):
-            metadata = response.response_metadata or {}
-            
-            # OpenAI format
-            token_usage = metadata.get("token_usage")
-            if token_usage:
-                prompt_tokens = token_usage.get("prompt_tokens", 0)
-                completion_tokens = token_usage.get("completion_tokens", 0)
-                total_tokens = token_usage.get("total_tokens", 0)
-            
-            # Google format (usage_metadata)
-            usage_metadata = metadata.get("usage_metadata")
-            if usage_metadata and not total_tokens:
-                prompt_tokens = usage_metadata.get("prompt_token_count", 0)
-                completion_tokens = usage_metadata.get("candidates_token_count", 0)
-                total_tokens = usage_metadata.get("total_token_count", 0)
-        
-        # Si no hay metadata, intentar calcular con tiktoken (fallback)
-        if total_tokens == 0:
-            try:
-                import tiktoken
-                
-                # Obtener encoding según el modelo
-                model_name = self.model.lower()
-                if "gpt-4" in model_name or "gpt-3.5" in model_name:
-                    encoding = tiktoken.encoding_for_model(model_name)
-                elif "gemini" in model_name:
-                    # Gemini usa cl100k_base (mismo que GPT-3.5)
-                    encoding = tiktoken.get_encoding("cl100k_base")
-                else:
-                    # Default
-                    encoding = tiktoken.get_encoding("cl100k_base")
-                
-                # Calcular tokens del prompt (si está disponible)
-                if hasattr(response, 'content'):
-                    # Solo podemos calcular completion tokens
-                    completion_text = response.content or ""
-                    completion_tokens = len(encoding.encode(completion_text))
-                    total_tokens = completion_tokens
-                    # Prompt tokens no se pueden calcular sin el prompt original
-                    prompt_tokens = 0
-                    
-            except ImportError:
-                logger.warning(
-                    "[TOKEN_TRACKER] tiktoken no disponible, no se pueden calcular tokens"
+        metadata = getattr(response, "response_metadata", None) or {}
+        
+        # Formato nativo del provider
+        if self.provider == "openai":
+            usage = metadata.get("token_usage")
+            if usage and usage.get("total_tokens"):
+                return (
+                    usage.get("prompt_tokens", 0),
+                    usage.get("completion_tokens", 0),
+                    usage["total_tokens"]
                 )
-            except Exception as e:
-                logger.warning(
-                    f"[TOKEN_TRACKER] Error calculando tokens con tiktoken: {e}"
+        elif self.provider == "google":
+            usage = metadata.get("usage_metadata")
+            if usage and usage.get("total_token_count"):
+                return (
+                    usage.get("prompt_token_count", 0),
+                    usage.get("candidates_token_count", 0),
+                    usage["total_token_count"]
                 )
         
-        return prompt_tokens, completion_tokens, total_tokens
+        # Formato estándar de LangChain (incluye chunks agregados de astream)
+        usage = getattr(response, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            return (
+                usage.get("input_tokens", 0),
+                usage.get("output_tokens", 0),
+                usage["total_tokens"]
+            )
+        
+        # Sin metadata: estimar con tiktoken si está habilitado o forzado
+        completion_text = getattr(response, "content", None)
+        if not (settings.TOKEN_FALLBACK_ENABLED or prompt is not None) or not completion_text:
+            return 0, 0, 0
+        
+        try:
+            encoding = _get_encoder(self.model.lower())
+            completion_tokens = len(encoding.encode(completion_text))
+            # Prompt tokens solo si se conoce la entrada
+            prompt_tokens = len(encoding.encode(_prompt_text(prompt))) if prompt else 0
+            return prompt_tokens, completion_tokens, prompt_tokens + completion_tokens
+        except ImportError:
+            logger.warning(
+                "[TOKEN_TRACKER] tiktoken no disponible, no se pueden calcular tokens"
+            )
+        except Exception as e:
+            logger.warning(
+                f"[TOKEN_TRACKER] Error calculando tokens con tiktoken: {e}"
+            )
+        
+        return 0, 0, 0
     
     async def ainvoke(
         self,
@@ -142,30 +185,43 @@ class TrackedLLM(BaseChatModel):
         """
         # Invocar LLM base
         response = await self.llm.ainvoke(input, config=config, **kwargs)
+        self._record_usage(response, "ainvoke")
+        return response
+    
+    async def astream(
+        self,
+        input: List[BaseMessage] | str,
+        config: Optional[Any] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Invoca el LLM en modo streaming y registra tokens al terminar.
         
-        # Extraer tokens
-        prompt_tokens, completion_tokens, total_tokens = self._extract_token_usage(response)
+        Si el consumidor cierra el stream antes de tiempo (ej: al detectar
+        un JSON completo), el chunk final con el usage del provider nunca
+        llega: los tokens se estiman con tiktoken sobre la entrada y lo
+        recibido, aunque TOKEN_FALLBACK_ENABLED esté desactivado.
         
-        # Registrar en tracker
-        if total_tokens > 0:
-            token_tracker.record_inference(
-                node_name=self.node_name,
-                inference_type=self.inference_type,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
-                metadata={
-                    "provider": self.provider,
-                    "model": self.model,
-                    "method": "ainvoke"
-                }
-            )
-        else:
-            logger.debug(
-                f"[TOKEN_TRACKER] No se pudieron extraer tokens de {self.node_name}"
-            )
+        Args:
+            input: Mensajes o texto de entrada
+            config: Configuración opcional
+            **kwargs: Argumentos adicionales
         
-        return response
+        Yields:
+            Chunks de la respuesta del LLM
+        """
+        aggregated = None
+        completed = False
+        try:
+            async for chunk in self.llm.astream(input, config=config, **kwargs):
+                aggregated = chunk if aggregated is None else aggregated + chunk
+                yield chunk
+            completed = True
+        finally:
+            if aggregated is not None:
+                self._record_usage(
+                    aggregated, "astream", prompt=None if completed else input
+                )
     
     def invoke(
         self,
@@ -186,11 +242,27 @@ class TrackedLLM(BaseChatModel):
         """
         # Invocar LLM base
         response = self.llm.invoke(input, config=config, **kwargs)
+        self._record_usage(response, "invoke")
+        return response
+    
+    def _record_usage(
+        self,
+        response: Any,
+        method: str,
+        prompt: Optional[List[BaseMessage] | str] = None
+    ) -> None:
+        """
+        Extrae los tokens de una respuesta y los registra en el tracker.
         
-        # Extraer tokens
-        prompt_tokens, completion_tokens, total_tokens = self._extract_token_usage(response)
+        Args:
+            response: Respuesta del LLM (AIMessage o chunk agregado)
+            method: Método de invocación (ainvoke, invoke, astream)
+            prompt: Entrada del LLM si hay que estimar los tokens
+        """
+        prompt_tokens, completion_tokens, total_tokens = self._extract_token_usage(
+            response, prompt=prompt
+        )
         
-        # Registrar en tracker
         if total_tokens > 0:
             token_tracker.record_inference(
                 node_name=self.node_name,
@@ -201,15 +273,13 @@ class TrackedLLM(BaseChatModel):
                 metadata={
                     "provider": self.provider,
                     "model": self.model,
-                    "method": "invoke"
+                    "method": method
                 }
             )
         else:
             logger.debug(
                 f"[TOKEN_TRACKER] No se pudieron extraer tokens de {self.node_name}"
             )
-        
-        return response
     
     def _generate(
         self,
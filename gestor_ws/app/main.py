@@ -2,39 +2,65 @@
 Gestor WS - API Principal
 Sistema de Gestión de Cobranza por WhatsApp
 """
+import asyncio
+import atexit
 import logging
+import queue
 import sys
+import time
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Awaitable, Callable
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
 
 from app.config import settings
-from app.database import init_db, close_db, check_db_connection
-from app.llm.factory import validate_llm_config, get_provider_info
+from app.database import init_db, close_db, check_db_connection, log_pool_config
+from app.llm.factory import validate_llm_config, get_provider_info, get_llm
 from app.adapters.mock_erp_adapter import get_erp_client, close_erp_client
 from app.services.whatsapp_service import close_whatsapp_service
+from app.services.vector_store import close_vector_store
+from app.services.interaccion_writer import get_interaccion_writer, close_interaccion_writer
+from app.mcp_client import close_mcp_client
+from app.http import close_shared_async_client
 from app.api import webhooks_erp_router, webhooks_whatsapp_router, admin_router
 
 
 # ============== LOGGING ==============
 
+# Listeners que escriben los logs desde un thread aparte
+_log_listeners: list[QueueListener] = []
+
+
 def setup_logging():
-    """Configura logging estructurado."""
-    import os
+    """
+    Configura logging estructurado.
+    
+    Los handlers (consola y archivos) corren en un QueueListener: el
+    event loop solo encola el registro y la escritura ocurre en otro thread.
+    """
     from pathlib import Path
     from logging.handlers import RotatingFileHandler
     
     log_format = (
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
+    formatter = logging.Formatter(log_format)
     
     # Crear directorio de logs si no existe
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
     
     # Handlers: consola + archivo
-    handlers = [logging.StreamHandler(sys.stdout)]
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
     
     # File handler para logs generales
     file_handler = RotatingFileHandler(
@@ -43,37 +69,52 @@ def setup_logging():
         backupCount=5,
         encoding="utf-8"
     )
-    file_handler.setFormatter(logging.Formatter(log_format))
-    handlers.append(file_handler)
+    file_handler.setFormatter(formatter)
     
     # File handler específico para token usage (JSON)
-    # Solo captura logs que contienen "TOKEN_USAGE"
-    class TokenUsageFilter(logging.Filter):
-        def filter(self, record):
-            return "TOKEN_USAGE" in record.getMessage()
-    
+    # Va colgado del logger "token_usage": no hace falta filtrar cada registro
     token_handler = RotatingFileHandler(
         log_dir / "token_usage.log",
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=10,
         encoding="utf-8"
     )
-    token_handler.setFormatter(logging.Formatter(log_format))
-    token_handler.addFilter(TokenUsageFilter())
-    handlers.append(token_handler)
+    token_handler.setFormatter(formatter)
+    
+    # Una cola por destino: el logger "token_usage" no propaga al root
+    log_queue = queue.SimpleQueue()
+    token_queue = queue.SimpleQueue()
+    _log_listeners.extend([
+        QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True),
+        QueueListener(token_queue, token_handler, respect_handler_level=True),
+    ])
+    for listener in _log_listeners:
+        listener.start()
+    atexit.register(stop_log_listeners)
     
+    # El QueueHandler solo arma el mensaje; el formato lo aplican los handlers
     logging.basicConfig(
         level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
-        format=log_format,
-        handlers=handlers
+        format="%(message)s",
+        handlers=[QueueHandler(log_queue)]
     )
     
+    token_logger = logging.getLogger("token_usage")
+    token_logger.propagate = False
+    token_logger.addHandler(QueueHandler(token_queue))
+    
     # Reducir verbosidad de librerías externas
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     logging.getLogger("openai").setLevel(logging.WARNING)
 
 
+def stop_log_listeners() -> None:
+    """Vacía las colas de logging y detiene los listeners."""
+    while _log_listeners:
+        _log_listeners.pop().stop()
+
+
 setup_logging()
 logger = logging.getLogger(__name__)
 
@@ -89,26 +130,49 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Iniciando Gestor WS...")
     
     try:
-        # 1. Validar configuración LLM
-        validate_llm_config()
+        # 1. Validar configuración LLM (si falla, la API arranca en modo degradado)
+        try:
+            validate_llm_config()
+            app.state.llm_ready = True
+        except Exception:
+            app.state.llm_ready = False
+            logger.warning("   ⚠️ LLM no disponible: los endpoints que lo usan responden 503")
         
-        # 2. Inicializar base de datos
+        # 2. Verificar base de datos y 3. verificar ERP (en paralelo)
+        # Las tablas se crean con `python -m app.cli init-db` (o AUTO_CREATE_TABLES)
         logger.info("📦 Conectando a base de datos...")
-        await init_db()
+        log_pool_config()
+        logger.info("🔗 Verificando conexión con ERP...")
+        erp = get_erp_client()
+        
+        async def init_and_check_db() -> bool:
+            if settings.AUTO_CREATE_TABLES:
+                await init_db()
+            return await check_db_connection()
+        
+        db_ok, erp_ok = await asyncio.gather(
+            init_and_check_db(),
+            erp.health_check(),
+            return_exceptions=True
+        )
+        # Un fallo en cualquiera de los dos no impide arrancar
+        db_ok = db_ok is True
+        erp_ok = erp_ok is True
+        app.state.erp_ready = erp_ok
         
-        if await check_db_connection():
+        if db_ok:
             logger.info("   ✅ Base de datos conectada")
         else:
             logger.warning("   ⚠️ No se pudo verificar conexión a BD")
         
-        # 3. Verificar conexión ERP
-        logger.info("🔗 Verificando conexión con ERP...")
-        erp = get_erp_client()
-        if await erp.health_check():
+        if erp_ok:
             logger.info(f"   ✅ ERP conectado ({settings.MOCK_ERP_URL})")
         else:
             logger.warning(f"   ⚠️ ERP no disponible ({settings.MOCK_ERP_URL})")
         
+        # 4. Escritor en lote de interacciones
+        get_interaccion_writer().start()
+        
         logger.info("✅ Gestor WS iniciado correctamente")
         logger.info(f"📡 API disponible en puerto {settings.API_PORT}")
         
@@ -123,9 +187,14 @@ async def lifespan(app: FastAPI):
     
     await close_erp_client()
     await close_whatsapp_service()
+    await close_vector_store()
+    await close_mcp_client()
+    await close_shared_async_client()
+    await close_interaccion_writer()
     await close_db()
     
     logger.info("👋 Gestor WS detenido")
+    stop_log_listeners()
 
 
 # ============== APP ==============
@@ -136,16 +205,20 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializa bastante más rápido que json de la stdlib
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
-# Configurar CORS
+# Configurar CORS: lista cerrada de orígenes, métodos y headers.
+# max_age permite al navegador cachear el preflight por un día.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
 # Incluir routers
@@ -154,6 +227,48 @@ app.include_router(webhooks_whatsapp_router)
 app.include_router(admin_router)
 
 
+# ============== HEALTH CACHE ==============
+# Stale-while-revalidate: los probes (BD, ERP) se sirven desde cache y,
+# si el valor venció, se refrescan en background. Solo la primera
+# consulta de cada probe espera el resultado real.
+
+HEALTH_CACHE_TTL_SECONDS = 5.0
+
+_health_cache: dict[str, tuple[float, bool]] = {}
+_health_refresh_tasks: dict[str, asyncio.Task] = {}
+
+
+async def _run_probe(key: str, probe: Callable[[], Awaitable[bool]]) -> bool:
+    """Ejecuta un probe y guarda el resultado (conserva el stale si falla)."""
+    try:
+        value = bool(await probe())
+    except Exception as e:
+        logger.warning(f"Health probe '{key}' falló: {e}")
+        cached = _health_cache.get(key)
+        return cached[1] if cached else False
+    
+    _health_cache[key] = (time.monotonic(), value)
+    return value
+
+
+async def _cached_probe(key: str, probe: Callable[[], Awaitable[bool]]) -> bool:
+    """Retorna el estado cacheado de un probe, refrescándolo si venció."""
+    cached = _health_cache.get(key)
+    if cached is None:
+        return await _run_probe(key, probe)
+    
+    timestamp, value = cached
+    if time.monotonic() - timestamp >= HEALTH_CACHE_TTL_SECONDS:
+        task = _health_refresh_tasks.get(key)
+        if task is None or task.done():
+            _health_refresh_tasks[key] = asyncio.create_task(_run_probe(key, probe))
+    return value
+
+
+def _erp_health_check() -> Awaitable[bool]:
+    return get_erp_client().health_check()
+
+
 # ============== ENDPOINTS BASE ==============
 
 @app.get("/", include_in_schema=False)
@@ -174,17 +289,17 @@ async def health():
     Health check del servicio.
     Retorna estado del sistema y configuración LLM.
     """
-    # Verificar BD
-    db_ok = await check_db_connection()
-    
-    # Verificar ERP
-    erp = get_erp_client()
-    erp_ok = await erp.health_check()
+    # Verificar BD y ERP (cacheados, en paralelo)
+    db_ok, erp_ok = await asyncio.gather(
+        _cached_probe("db", check_db_connection),
+        _cached_probe("erp", _erp_health_check)
+    )
     
     # Info LLM
     llm_info = get_provider_info()
     
-    status = "healthy" if (db_ok and erp_ok) else "degraded"
+    llm_ready = getattr(app.state, "llm_ready", True)
+    status = "healthy" if (db_ok and erp_ok and llm_ready) else "degraded"
     
     return {
         "status": status,
@@ -196,7 +311,8 @@ async def health():
         },
         "llm": {
             "provider": llm_info["provider"],
-            "model": llm_info["model"]
+            "model": llm_info["model"],
+            "ready": llm_ready
         },
         "config": {
             "erp_url": settings.MOCK_ERP_URL,
@@ -212,8 +328,6 @@ async def health_llm():
     Útil para verificar que el provider está configurado.
     """
     try:
-        from app.llm.factory import get_llm
-        
         llm = get_llm()
         llm_info = get_provider_info()
         
@@ -241,8 +355,7 @@ async def health_erp():
     Health check específico del ERP.
     """
     try:
-        erp = get_erp_client()
-        is_healthy = await erp.health_check()
+        is_healthy = await _cached_probe("erp", _erp_health_check)
         
         return {
             "status": "ok" if is_healthy else "error",
@@ -2,17 +2,105 @@
 MCP Client - Cliente para conectarse al MCP Tools Server.
 Permite que el agente autónomo use las tools de forma dinámica.
 """
+import asyncio
+import json
 import logging
+import threading
+import time
 from typing import Optional, Any
 from dataclasses import dataclass
 import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
 
 from app.config import settings
+from app.http import get_shared_async_client
 
 logger = logging.getLogger(__name__)
 
+# Los bodies se serializan a bytes con _dumps
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Cache de tools: pasado el TTL se revalida contra /tools/version en
+# background (sirviendo el cache); pasado el hard TTL se espera la revalidación
+TOOLS_CACHE_TTL_SECONDS = 60.0
+TOOLS_CACHE_HARD_TTL_SECONDS = 600.0
+
+# Circuit breaker: tras N fallos seguidos no se llama al servidor
+# durante CIRCUIT_OPEN_SECONDS (falla rápido en lugar de acumular esperas)
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 30.0
+
+
+MAX_POST_ATTEMPTS = 3
+
+# Tools de solo lectura: se pueden reintentar aunque el servidor ya haya
+# recibido el request. El resto (crear_ticket, enviar_whatsapp, ...) tiene
+# efectos y solo se reintenta si el request no llegó a enviarse
+READ_ONLY_TOOLS = frozenset({
+    "consultar_estado_cuenta",
+    "obtener_link_pago",
+    "buscar_alumno",
+    "buscar_ticket",
+    "clasificar_prioridad",
+    "listar_tickets_pendientes",
+    "buscar_horarios",
+    "buscar_calendario",
+    "buscar_autoridades",
+    "buscar_contacto",
+    "buscar_info_general",
+    "analizar_patrones_pago",
+    "calcular_riesgo_desercion",
+    "obtener_cuotas_por_vencer",
+})
+
+
+class MCPCircuitOpenError(Exception):
+    """El circuit breaker está abierto: no se contacta al MCP Server."""
+
+
+def _not_sent(exc: BaseException) -> bool:
+    """Errores en los que el request no llegó al servidor."""
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Además de _not_sent: timeouts de lectura, cortes de protocolo y 5xx."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return _not_sent(exc) or isinstance(exc, (httpx.ReadTimeout, httpx.RemoteProtocolError))
+
+
+def _dumps(payload: Any) -> bytes:
+    """Serializa el body JSON (orjson si está instalado)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(content: bytes) -> Any:
+    """Parsea un body JSON (orjson si está instalado)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
-@dataclass
+
+# Envelopes JSON-RPC de forma fija: se arma el body una sola vez (ping)
+# o se insertan solo params e id ya serializados (tools/call)
+_MCP_PING_BODY = _dumps({"jsonrpc": "2.0", "method": "ping", "params": {}, "id": "ping"})
+_MCP_CALL_TEMPLATE = b'{"jsonrpc":"2.0","method":"tools/call","params":%s,"id":%s}'
+
+
+@dataclass(slots=True)
 class ToolSchema:
     """Schema de una herramienta MCP."""
     name: str
@@ -21,7 +109,7 @@ class ToolSchema:
     category: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResult:
     """Resultado de ejecutar una herramienta."""
     success: bool
@@ -46,50 +134,133 @@ class MCPClient:
     def __init__(
         self,
         base_url: str = None,
-        timeout: float = 30.0,
-        mock_mode: bool = None
+        timeout: Optional[float] = None,
+        mock_mode: bool = None,
+        client: Optional[httpx.AsyncClient] = None
     ):
         """
         Inicializa el cliente MCP.
         
         Args:
             base_url: URL del MCP server. Si no se especifica, usa MCP_TOOLS_URL de settings.
-            timeout: Timeout para requests.
+            timeout: Timeout para requests. Por defecto, el del cliente HTTP.
             mock_mode: Si usar modo local mock (sin conectar al servidor).
+            client: Cliente HTTP a usar. Por defecto, el compartido del proceso
+                (app.http); no se cierra en close().
         """
         self.base_url = (base_url or getattr(settings, 'MCP_TOOLS_URL', 'http://localhost:8003')).rstrip("/")
-        self.timeout = timeout
+        self.timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
         self.mock_mode = mock_mode if mock_mode is not None else getattr(settings, 'MOCK_MODE', True)
-        self._client: Optional[httpx.AsyncClient] = None
+        # El agente dispara varias tools en paralelo: todas comparten el
+        # pool de conexiones keep-alive del cliente HTTP
+        self._client = client or get_shared_async_client()
         self._tools_cache: Optional[list[ToolSchema]] = None
+        self._tools_cache_version: Optional[str] = None
+        # Formato LLM del cache, armado una vez por carga (solo lectura)
+        self._tools_for_llm_cache: Optional[list[dict]] = None
+        self._tools_cache_expiry = 0.0  # time.monotonic()
+        self._tools_cache_hard_expiry = 0.0
+        self._tools_refresh_task: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0  # time.monotonic()
         
         logger.info(f"MCPClient inicializado - URL: {self.base_url}, Mock: {self.mock_mode}")
     
+    async def __aenter__(self) -> "MCPClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
     async def _get_client(self) -> httpx.AsyncClient:
-        """Obtiene o crea el cliente HTTP."""
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=self.timeout
-            )
+        """Retorna el cliente HTTP."""
         return self._client
     
+    def _url(self, path: str) -> str:
+        """URL absoluta de un endpoint del servidor."""
+        return f"{self.base_url}{path}"
+    
     async def close(self):
-        """Cierra el cliente."""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        """
+        Cancela la revalidación de tools en curso.
+        
+        El cliente HTTP no se cierra: es compartido (o inyectado) y lo
+        cierra quien lo creó (close_shared_async_client en el lifespan).
+        """
+        if self._tools_refresh_task is not None and not self._tools_refresh_task.done():
+            self._tools_refresh_task.cancel()
+        self._tools_refresh_task = None
+    
+    @property
+    def circuit_open(self) -> bool:
+        """Indica si el circuit breaker está cortando las llamadas."""
+        return time.monotonic() < self._circuit_open_until
+    
+    async def _post(self, path: str, content: bytes, idempotent: bool = False) -> httpx.Response:
+        """
+        POST al servidor con reintentos y circuit breaker.
+        
+        Los errores en los que el request no llegó al servidor se
+        reintentan siempre; timeouts de lectura, cortes y 5xx solo si
+        `idempotent` (el servidor pudo haber ejecutado la tool).
+        
+        Raises:
+            MCPCircuitOpenError: Si el circuito está abierto
+            httpx.HTTPStatusError: Si la respuesta sigue siendo 5xx
+            httpx.TransportError: Si el servidor no responde
+        """
+        if self.circuit_open:
+            raise MCPCircuitOpenError("circuit open: MCP Server no disponible")
+        
+        try:
+            response = await self._post_with_retry(path, content, idempotent)
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                self._circuit_open_until = time.monotonic() + CIRCUIT_OPEN_SECONDS
+                logger.warning(
+                    f"MCP Server: {self._consecutive_failures} fallos seguidos, "
+                    f"circuito abierto por {CIRCUIT_OPEN_SECONDS:.0f}s"
+                )
+            raise
+        
+        self._consecutive_failures = 0
+        return response
+    
+    async def _post_with_retry(
+        self,
+        path: str,
+        content: bytes,
+        idempotent: bool
+    ) -> httpx.Response:
+        """POST con backoff exponencial; los 5xx se levantan como error."""
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(_is_retryable if idempotent else _not_sent),
+            wait=wait_exponential_jitter(initial=0.1, max=2.0),
+            stop=stop_after_attempt(MAX_POST_ATTEMPTS),
+            reraise=True
+        ):
+            with attempt:
+                response = await self._client.post(
+                    self._url(path),
+                    content=content,
+                    headers=_JSON_HEADERS,
+                    timeout=self.timeout
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+        return response
     
     async def ping(self) -> bool:
         """Verifica si el servidor está disponible."""
         try:
             client = await self._get_client()
-            response = await client.post("/mcp", json={
-                "jsonrpc": "2.0",
-                "method": "ping",
-                "params": {},
-                "id": "ping"
-            })
+            response = await client.post(
+                self._url("/mcp"),
+                content=_MCP_PING_BODY,
+                headers=_JSON_HEADERS,
+                timeout=self.timeout
+            )
             return response.status_code == 200
         except Exception as e:
             logger.warning(f"MCP Server no disponible: {e}")
@@ -106,19 +277,43 @@ class MCPClient:
         Returns:
             Lista de ToolSchema con las herramientas disponibles
         """
-        if self._tools_cache and not force_refresh and not category:
+        if category:
+            return await self._fetch_tools(category) or []
+        
+        if self._tools_cache and not force_refresh:
+            now = time.monotonic()
+            if now < self._tools_cache_expiry:
+                return self._tools_cache
+            
+            if now < self._tools_cache_hard_expiry:
+                # Stale-while-revalidate: se sirve el cache y se revalida aparte
+                if self._tools_refresh_task is None or self._tools_refresh_task.done():
+                    self._tools_refresh_task = asyncio.create_task(self._revalidate_tools())
+                return self._tools_cache
+            
+            await self._revalidate_tools()
             return self._tools_cache
         
+        await self._fetch_tools()
+        return self._tools_cache or []
+    
+    async def _fetch_tools(self, category: str = None) -> Optional[list[ToolSchema]]:
+        """
+        Descarga las tools del servidor. Sin categoría, reemplaza el cache.
+        
+        Returns:
+            Lista de ToolSchema o None si falló (el cache queda intacto)
+        """
         try:
             client = await self._get_client()
             params = {}
             if category:
                 params["category"] = category
             
-            response = await client.get("/tools", params=params)
+            response = await client.get(self._url("/tools"), params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response.content)
             tools = [
                 ToolSchema(
                     name=t["name"],
@@ -130,14 +325,58 @@ class MCPClient:
             ]
             
             if not category:
-                self._tools_cache = tools
+                self.set_tools_cache(tools, version=data.get("version"))
             
             logger.info(f"Tools cargadas desde MCP: {len(tools)}")
             return tools
             
         except Exception as e:
             logger.error(f"Error listando tools: {e}")
-            return []
+            return None
+    
+    async def _revalidate_tools(self) -> None:
+        """
+        Compara la versión del servidor con la del cache: si coincide solo
+        extiende el TTL, si no (o no se conoce) vuelve a descargar las tools.
+        """
+        try:
+            client = await self._get_client()
+            response = await client.get(self._url("/tools/version"), timeout=self.timeout)
+            response.raise_for_status()
+            version = _loads(response.content).get("version")
+        except Exception as e:
+            logger.debug(f"No se pudo obtener la versión de tools: {e}")
+            version = None
+        
+        if version is not None and version == self._tools_cache_version:
+            self._touch_tools_cache()
+            return
+        
+        await self._fetch_tools()
+    
+    @property
+    def tools_version(self) -> Optional[str]:
+        """Versión del set de tools cacheado (None si no se conoce)."""
+        return self._tools_cache_version
+    
+    def _touch_tools_cache(self) -> None:
+        """Reinicia los TTL del cache de tools."""
+        now = time.monotonic()
+        self._tools_cache_expiry = now + TOOLS_CACHE_TTL_SECONDS
+        self._tools_cache_hard_expiry = now + TOOLS_CACHE_HARD_TTL_SECONDS
+    
+    def set_tools_cache(self, tools: list[ToolSchema], version: Optional[str] = None) -> None:
+        """
+        Precarga el cache de tools (ej: desde un snapshot en disco).
+        
+        Args:
+            tools: Lista de ToolSchema
+            version: Versión del set de tools en el servidor (si se conoce)
+        """
+        self._tools_cache = tools
+        self._tools_cache_version = version
+        self._tools_for_llm_cache = self._format_tools_for_llm(tools)
+        self._touch_tools_cache()
     
     async def get_tool_schema(self, name: str) -> Optional[ToolSchema]:
         """
@@ -151,13 +390,13 @@ class MCPClient:
         """
         try:
             client = await self._get_client()
-            response = await client.get(f"/tools/{name}")
+            response = await client.get(self._url(f"/tools/{name}"), timeout=self.timeout)
             
             if response.status_code == 404:
                 return None
             
             response.raise_for_status()
-            data = response.json()
+            data = _loads(response.content)
             
             return ToolSchema(
                 name=data["name"],
@@ -174,6 +413,9 @@ class MCPClient:
         """
         Ejecuta una herramienta.
         
+        Solo las tools de READ_ONLY_TOOLS se reintentan ante timeouts de
+        lectura o 5xx: reintentar una tool con efectos la ejecutaría dos veces.
+        
         Args:
             name: Nombre de la tool a ejecutar
             arguments: Argumentos para la tool
@@ -184,14 +426,13 @@ class MCPClient:
         arguments = arguments or {}
         
         try:
-            client = await self._get_client()
-            response = await client.post(f"/tools/{name}/call", json={
+            response = await self._post(f"/tools/{name}/call", _dumps({
                 "name": name,
                 "arguments": arguments
-            })
+            }), idempotent=name in READ_ONLY_TOOLS)
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response.content)
             
             return ToolResult(
                 success=data.get("success", False),
@@ -214,6 +455,37 @@ class MCPClient:
                 error=str(e)
             )
     
+    async def call_tools_parallel(
+        self,
+        specs: list[tuple[str, dict]],
+        max_concurrency: int = 10
+    ) -> list[ToolResult]:
+        """
+        Ejecuta herramientas independientes en paralelo.
+        
+        Args:
+            specs: Lista de (nombre, argumentos)
+            max_concurrency: Máximo de llamadas simultáneas
+        
+        Returns:
+            Lista de ToolResult en el mismo orden que `specs`
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        
+        async def _one(name: str, arguments: dict) -> ToolResult:
+            async with sem:
+                return await self.call_tool(name, arguments)
+        
+        results = await asyncio.gather(
+            *(_one(name, arguments) for name, arguments in specs),
+            return_exceptions=True
+        )
+        return [
+            ToolResult(success=False, data=None, error=str(r))
+            if isinstance(r, BaseException) else r
+            for r in results
+        ]
+    
     async def call_tool_mcp(self, name: str, arguments: dict = None) -> ToolResult:
         """
         Ejecuta una herramienta usando el protocolo MCP JSON-RPC.
@@ -228,33 +500,13 @@ class MCPClient:
         arguments = arguments or {}
         
         try:
-            client = await self._get_client()
-            response = await client.post("/mcp", json={
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": name,
-                    "arguments": arguments
-                },
-                "id": f"call-{name}"
-            })
+            response = await self._post("/mcp", _MCP_CALL_TEMPLATE % (
+                _dumps({"name": name, "arguments": arguments}),
+                _dumps(f"call-{name}")
+            ), idempotent=name in READ_ONLY_TOOLS)
             response.raise_for_status()
             
-            data = response.json()
-            
-            if "error" in data:
-                return ToolResult(
-                    success=False,
-                    data=None,
-                    error=data["error"].get("message", "Unknown error")
-                )
-            
-            result = data.get("result", {})
-            return ToolResult(
-                success=result.get("success", False),
-                data=result.get("data"),
-                error=result.get("error")
-            )
+            return self._parse_mcp_result(_loads(response.content))
             
         except Exception as e:
             logger.error(f"Error MCP llamando tool {name}: {e}")
@@ -264,6 +516,75 @@ class MCPClient:
                 error=str(e)
             )
     
+    async def call_tools_mcp_batch(self, calls: list[tuple[str, dict]]) -> list[ToolResult]:
+        """
+        Ejecuta varias herramientas en un solo request (batch JSON-RPC).
+        
+        Si el servidor no acepta batches, cae a llamadas individuales
+        en paralelo.
+        
+        Args:
+            calls: Lista de (nombre, argumentos)
+        
+        Returns:
+            Lista de ToolResult en el mismo orden que `calls`
+        """
+        if not calls:
+            return []
+        
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "method": "tools/call",
+                "params": {"name": name, "arguments": arguments or {}},
+                "id": f"c-{i}"
+            }
+            for i, (name, arguments) in enumerate(calls)
+        ]
+        
+        try:
+            response = await self._post(
+                "/mcp",
+                _dumps(payload),
+                idempotent=all(name in READ_ONLY_TOOLS for name, _ in calls)
+            )
+            data = _loads(response.content) if response.status_code == 200 else None
+        except Exception as e:
+            logger.error(f"Error MCP en batch de {len(calls)} tools: {e}")
+            return [ToolResult(success=False, data=None, error=str(e)) for _ in calls]
+        
+        if not isinstance(data, list):
+            logger.warning("MCP Server sin soporte de batch, llamando tools por separado")
+            return list(await asyncio.gather(
+                *(self.call_tool_mcp(name, arguments) for name, arguments in calls)
+            ))
+        
+        # Las respuestas de un batch pueden venir en cualquier orden
+        by_id = {item.get("id"): item for item in data}
+        return [
+            self._parse_mcp_result(by_id[f"c-{i}"])
+            if f"c-{i}" in by_id
+            else ToolResult(success=False, data=None, error="Sin respuesta en el batch")
+            for i in range(len(calls))
+        ]
+    
+    @staticmethod
+    def _parse_mcp_result(data: dict) -> ToolResult:
+        """Convierte una respuesta JSON-RPC de tools/call en ToolResult."""
+        if "error" in data and data["error"]:
+            return ToolResult(
+                success=False,
+                data=None,
+                error=data["error"].get("message", "Unknown error")
+            )
+        
+        result = data.get("result") or {}
+        return ToolResult(
+            success=result.get("success", False),
+            data=result.get("data"),
+            error=result.get("error")
+        )
+    
     def get_tools_for_llm(self, tools: list[ToolSchema] = None) -> list[dict]:
         """
         Convierte las tools al formato esperado por LLM (OpenAI/Langchain).
@@ -272,10 +593,16 @@ class MCPClient:
             tools: Lista de tools. Si no se especifica, usa el cache.
         
         Returns:
-            Lista de dicts en formato OpenAI function calling
+            Lista de dicts en formato OpenAI function calling (la del cache
+            es compartida: no modificar)
         """
-        tools = tools or self._tools_cache or []
-        
+        if not tools:
+            return self._tools_for_llm_cache or []
+        return self._format_tools_for_llm(tools)
+    
+    @staticmethod
+    def _format_tools_for_llm(tools: list[ToolSchema]) -> list[dict]:
+        """Arma la lista de tools en formato OpenAI function calling."""
         return [
             {
                 "type": "function",
@@ -291,16 +618,28 @@ class MCPClient:
 
 # Singleton global
 _mcp_client: Optional[MCPClient] = None
+# get_mcp_client es sync y puede llamarse desde threads (ej: scripts)
+_mcp_client_lock = threading.Lock()
 
 
 def get_mcp_client() -> MCPClient:
     """Obtiene el cliente MCP singleton."""
     global _mcp_client
     if _mcp_client is None:
-        _mcp_client = MCPClient()
+        with _mcp_client_lock:
+            if _mcp_client is None:
+                _mcp_client = MCPClient()
     return _mcp_client
 
 
+async def close_mcp_client() -> None:
+    """Cierra el cliente MCP."""
+    global _mcp_client
+    if _mcp_client:
+        await _mcp_client.close()
+        _mcp_client = None
+
+
 async def call_mcp_tool(name: str, arguments: dict = None) -> ToolResult:
     """
     Función de conveniencia para llamar una tool.
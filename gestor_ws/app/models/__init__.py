@@ -1,10 +1,21 @@
 """
 Modelos SQLAlchemy para Gestor WS.
+
+Los modelos se importan recién al accederlos (PEP 562): importar un
+submódulo no carga el resto.
 """
-from app.models.cache import CacheResponsable, CacheAlumno, CacheCuota
-from app.models.interacciones import Interaccion, SincronizacionLog
-from app.models.tickets import Ticket, NotificacionEnviada
-from app.models.token_usage import TokenUsage
+import importlib
+
+_LAZY = {
+    "CacheResponsable": "app.models.cache",
+    "CacheAlumno": "app.models.cache",
+    "CacheCuota": "app.models.cache",
+    "Interaccion": "app.models.interacciones",
+    "SincronizacionLog": "app.models.interacciones",
+    "Ticket": "app.models.tickets",
+    "NotificacionEnviada": "app.models.tickets",
+    "TokenUsage": "app.models.token_usage",
+}
 
 __all__ = [
     "CacheResponsable",
@@ -18,4 +29,9 @@ __all__ = [
 ]
 
 
-
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
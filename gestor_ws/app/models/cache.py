@@ -7,11 +7,12 @@ from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import String, DateTime, Date, Numeric, Text, func
+from sqlalchemy import String, DateTime, Date, Numeric, Text, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.models.types import PhoneNumber, uuid7
 
 
 class CacheResponsable(Base):
@@ -22,7 +23,7 @@ class CacheResponsable(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     erp_responsable_id: Mapped[str] = mapped_column(
         String(100),
@@ -30,16 +31,16 @@ class CacheResponsable(Base):
         nullable=False,
         index=True
     )
-    nombre: Mapped[Optional[str]] = mapped_column(String(200))
-    apellido: Mapped[Optional[str]] = mapped_column(String(200))
+    nombre: Mapped[Optional[str]] = mapped_column(Text)
+    apellido: Mapped[Optional[str]] = mapped_column(Text)
     whatsapp: Mapped[Optional[str]] = mapped_column(
-        String(20),
+        PhoneNumber,
         unique=True,
         index=True
     )
-    email: Mapped[Optional[str]] = mapped_column(String(200))
+    email: Mapped[Optional[str]] = mapped_column(Text)
     ultima_sync: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         onupdate=func.now()
     )
@@ -61,7 +62,7 @@ class CacheAlumno(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     erp_alumno_id: Mapped[str] = mapped_column(
         String(100),
@@ -69,15 +70,15 @@ class CacheAlumno(Base):
         nullable=False,
         index=True
     )
-    nombre: Mapped[Optional[str]] = mapped_column(String(200))
-    apellido: Mapped[Optional[str]] = mapped_column(String(200))
-    grado: Mapped[Optional[str]] = mapped_column(String(100))
+    nombre: Mapped[Optional[str]] = mapped_column(Text)
+    apellido: Mapped[Optional[str]] = mapped_column(Text)
+    grado: Mapped[Optional[str]] = mapped_column(Text)
     erp_responsable_id: Mapped[Optional[str]] = mapped_column(
         String(100),
         index=True
     )
     ultima_sync: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         onupdate=func.now()
     )
@@ -99,7 +100,7 @@ class CacheCuota(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     erp_cuota_id: Mapped[str] = mapped_column(
         String(100),
@@ -113,11 +114,11 @@ class CacheCuota(Base):
     )
     monto: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2))
     fecha_vencimiento: Mapped[Optional[date]] = mapped_column(Date, index=True)
-    estado: Mapped[Optional[str]] = mapped_column(String(50), index=True)
+    estado: Mapped[Optional[str]] = mapped_column(String(50))
     link_pago: Mapped[Optional[str]] = mapped_column(Text)
-    fecha_pago: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    fecha_pago: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     ultima_sync: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         onupdate=func.now()
     )
@@ -133,4 +134,16 @@ class CacheCuota(Base):
         return self.fecha_vencimiento < date.today() and self.estado != "pagada"
 
 
+# Cuotas por estado y vencimiento (recordatorios)
+Index(
+    "ix_cache_cuotas_estado_vencimiento",
+    CacheCuota.estado,
+    CacheCuota.fecha_vencimiento
+)
 
+# Cuotas impagas por vencimiento: índice parcial, excluye las pagadas
+Index(
+    "ix_cache_cuotas_impagas_vencimiento",
+    CacheCuota.fecha_vencimiento,
+    postgresql_where=CacheCuota.estado != "pagada"
+)
@@ -5,11 +5,12 @@ import uuid
 from datetime import datetime
 from typing import Optional, Any
 
-from sqlalchemy import String, DateTime, Text, func
+from sqlalchemy import String, DateTime, Text, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.models.types import PhoneNumber, uuid7
 
 
 class Interaccion(Base):
@@ -23,12 +24,11 @@ class Interaccion(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     whatsapp_from: Mapped[str] = mapped_column(
-        String(20),
-        nullable=False,
-        index=True
+        PhoneNumber,
+        nullable=False
     )
     erp_alumno_id: Mapped[Optional[str]] = mapped_column(
         String(100),
@@ -43,9 +43,15 @@ class Interaccion(Base):
     agente: Mapped[Optional[str]] = mapped_column(
         String(20)
     )  # bot, asistente, coordinador, humano
-    extra_data: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB)
+    # Columna "meta": "metadata" choca con Base.metadata de SQLAlchemy
+    extra_data: Mapped[dict[str, Any]] = mapped_column(
+        "meta",
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb")
+    )
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         index=True
     )
@@ -83,8 +89,42 @@ class Interaccion(Base):
             tipo="respuesta",
             contenido=contenido,
             agente=agente,
-            extra_data=extra_data
+            extra_data=extra_data or {}
         )
+    
+    def to_dict(self) -> dict:
+        """
+        Mapping listo para `insert(Interaccion)` en lote.
+
+        Permite acumular las interacciones creadas con las factories y
+        escribirlas juntas con `log_interactions_bulk` en lugar de un
+        `session.add()` por fila. id y timestamp quedan a cargo de los
+        defaults de las columnas.
+        """
+        return {
+            "whatsapp_from": self.whatsapp_from,
+            "erp_alumno_id": self.erp_alumno_id,
+            "erp_cuota_id": self.erp_cuota_id,
+            "tipo": self.tipo,
+            "contenido": self.contenido,
+            "agente": self.agente,
+            "extra_data": self.extra_data
+        }
+
+
+# Historial de un número ordenado por fecha
+Index(
+    "ix_interacciones_whatsapp_timestamp",
+    Interaccion.whatsapp_from,
+    Interaccion.timestamp.desc()
+)
+
+Index(
+    "ix_interacciones_meta_gin",
+    Interaccion.extra_data,
+    postgresql_using="gin",
+    postgresql_ops={"meta": "jsonb_path_ops"}
+)
 
 
 class SincronizacionLog(Base):
@@ -98,7 +138,7 @@ class SincronizacionLog(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     tipo: Mapped[Optional[str]] = mapped_column(
         String(50),
@@ -112,12 +152,23 @@ class SincronizacionLog(Base):
         String(20)
     )  # create, update, delete
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         index=True
     )
-    payload: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB)
+    payload: Mapped[dict[str, Any]] = mapped_column(
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb")
+    )
     
     def __repr__(self) -> str:
         return f"<SincronizacionLog {self.tipo}/{self.accion} - {self.erp_id}>"
 
+
+Index(
+    "ix_sincronizaciones_log_payload_gin",
+    SincronizacionLog.payload,
+    postgresql_using="gin",
+    postgresql_ops={"payload": "jsonb_path_ops"}
+)
@@ -2,14 +2,15 @@
 Modelos para gestión de tickets y notificaciones.
 """
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Any
 
-from sqlalchemy import String, DateTime, Text, Boolean, func
+from sqlalchemy import String, DateTime, Text, Boolean, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.models.types import PhoneNumber, uuid7
 
 
 class Ticket(Base):
@@ -23,7 +24,7 @@ class Ticket(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     erp_alumno_id: Mapped[str] = mapped_column(
         String(100),
@@ -39,13 +40,14 @@ class Ticket(Base):
         index=True
     )  # plan_pago, reclamo, baja, consulta_admin
     motivo: Mapped[Optional[str]] = mapped_column(Text)
-    contexto: Mapped[Optional[dict[str, Any]]] = mapped_column(
-        JSONB
+    contexto: Mapped[dict[str, Any]] = mapped_column(
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb")
     )  # Conversación completa
     estado: Mapped[str] = mapped_column(
         String(20),
-        default="pendiente",
-        index=True
+        default="pendiente"
     )  # pendiente, en_proceso, resuelto
     prioridad: Mapped[str] = mapped_column(
         String(20),
@@ -54,11 +56,11 @@ class Ticket(Base):
     )  # baja, media, alta
     respuesta_admin: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now(),
         index=True
     )
-    resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     def __repr__(self) -> str:
         return f"<Ticket {self.id} - {self.categoria} ({self.estado})>"
@@ -77,7 +79,7 @@ class Ticket(Base):
         """Marca el ticket como resuelto."""
         self.estado = "resuelto"
         self.respuesta_admin = respuesta
-        self.resolved_at = datetime.now()
+        self.resolved_at = datetime.now(timezone.utc)
     
     @classmethod
     def crear(
@@ -95,11 +97,37 @@ class Ticket(Base):
             erp_responsable_id=erp_responsable_id,
             categoria=categoria,
             motivo=motivo,
-            contexto=contexto,
+            contexto=contexto or {},
             prioridad=prioridad
         )
 
 
+# Listado filtrado por estado y ordenado por fecha (admin /tickets)
+Index("ix_tickets_estado_created", Ticket.estado, Ticket.created_at.desc())
+
+# Cola de pendientes por antigüedad: índice parcial, solo pendientes
+Index(
+    "ix_tickets_pendientes",
+    Ticket.created_at.desc(),
+    postgresql_where=Ticket.estado == "pendiente"
+)
+
+# Pendientes por prioridad (admin /stats): índice parcial, solo pendientes
+Index(
+    "ix_tickets_prioridad_pendientes",
+    Ticket.prioridad,
+    postgresql_where=Ticket.estado == "pendiente"
+)
+
+# Búsquedas por contenido del contexto (contexto @> '{...}')
+Index(
+    "ix_tickets_contexto_gin",
+    Ticket.contexto,
+    postgresql_using="gin",
+    postgresql_ops={"contexto": "jsonb_path_ops"}
+)
+
+
 class NotificacionEnviada(Base):
     """
     Registro de notificaciones enviadas por WhatsApp.
@@ -111,7 +139,7 @@ class NotificacionEnviada(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4
+        default=uuid7
     )
     erp_cuota_id: Mapped[str] = mapped_column(
         String(100),
@@ -119,7 +147,7 @@ class NotificacionEnviada(Base):
         index=True
     )
     whatsapp_to: Mapped[Optional[str]] = mapped_column(
-        String(20),
+        PhoneNumber,
         index=True
     )
     tipo: Mapped[Optional[str]] = mapped_column(
@@ -127,7 +155,7 @@ class NotificacionEnviada(Base):
         index=True
     )  # recordatorio_d7, recordatorio_d3, recordatorio_d1, confirmacion_pago
     fecha_envio: Mapped[datetime] = mapped_column(
-        DateTime,
+        DateTime(timezone=True),
         default=func.now()
     )
     leido: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -163,4 +191,9 @@ class NotificacionEnviada(Base):
         )
 
 
-
+# Última notificación de una cuota (evitar duplicados)
+Index(
+    "ix_notificaciones_cuota_fecha",
+    NotificacionEnviada.erp_cuota_id,
+    NotificacionEnviada.fecha_envio.desc()
+)
@@ -2,13 +2,11 @@
 Modelo de datos para tracking de tokens.
 Preparado para persistencia futura en base de datos.
 """
-import uuid
-from datetime import datetime
-from typing import Optional
-from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, String, Integer, DateTime, Text, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from app.database import Base
+from app.models.types import PhoneNumber, uuid7
 
 
 class TokenUsage(Base):
@@ -24,7 +22,7 @@ class TokenUsage(Base):
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         index=True
     )
     
@@ -37,7 +35,7 @@ class TokenUsage(Base):
     )
     
     whatsapp = Column(
-        String(50),
+        PhoneNumber,
         nullable=False,
         index=True,
         comment="Número de WhatsApp del usuario"
@@ -77,10 +75,10 @@ class TokenUsage(Base):
         comment="Total de tokens de salida (completion)"
     )
     
+    # Columna generada por Postgres: no se escribe y no puede desincronizarse
     total_tokens = Column(
         Integer,
-        nullable=False,
-        default=0,
+        Computed("total_prompt_tokens + total_completion_tokens", persisted=True),
         comment="Total de tokens (prompt + completion)"
     )
     
@@ -97,10 +95,11 @@ class TokenUsage(Base):
         comment="Modelo LLM usado (gpt-4o, gemini-2.0-flash-exp, etc.)"
     )
     
-    # Inferencias detalladas (JSON)
+    # Inferencias detalladas (JSONB: JSON se guarda como texto y no admite GIN)
     inferences_json = Column(
-        JSON,
-        nullable=True,
+        JSONB,
+        nullable=False,
+        server_default=text("'[]'::jsonb"),
         comment="Array de InferenceRecord serializado en JSON"
     )
     
@@ -108,7 +107,7 @@ class TokenUsage(Base):
     created_at = Column(
         DateTime(timezone=True),
         nullable=False,
-        default=datetime.utcnow,
+        server_default=func.now(),
         comment="Fecha de creación del registro"
     )
     
@@ -116,6 +115,12 @@ class TokenUsage(Base):
     __table_args__ = (
         Index('idx_token_usage_whatsapp_created', 'whatsapp', 'created_at'),
         Index('idx_token_usage_query_id', 'query_id'),
+        Index(
+            'ix_token_usage_inferences_gin',
+            'inferences_json',
+            postgresql_using='gin',
+            postgresql_ops={'inferences_json': 'jsonb_path_ops'}
+        ),
     )
     
     def __repr__(self) -> str:
@@ -125,19 +130,24 @@ class TokenUsage(Base):
         )
     
     def to_dict(self) -> dict:
-        """Convierte el modelo a dict para serialización."""
+        """
+        Convierte el modelo a dict para serialización.
+
+        Los datetime se devuelven tal cual: orjson los serializa de forma
+        nativa (ISO 8601) sin un isoformat() por fila.
+        """
         return {
             "id": str(self.id),
             "query_id": self.query_id,
             "whatsapp": self.whatsapp,
             "mensaje": self.mensaje,
-            "start_time": self.start_time.isoformat() if self.start_time else None,
-            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
             "total_prompt_tokens": self.total_prompt_tokens,
             "total_completion_tokens": self.total_completion_tokens,
             "total_tokens": self.total_tokens,
             "provider": self.provider,
             "model": self.model,
             "inferences_json": self.inferences_json,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": self.created_at
         }
@@ -0,0 +1,72 @@
+"""
+Tipos de columna compartidos por los modelos.
+"""
+import os
+import re
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+
+_NO_DIGITS = re.compile(r"\D")
+
+
+def uuid7() -> uuid.UUID:
+    """
+    UUID versión 7 (RFC 9562): 48 bits de timestamp en ms + aleatorio.
+
+    Ordenado por tiempo: las inserciones caen en la última hoja del
+    B-tree de la PK en lugar de en páginas al azar como con uuid4.
+    """
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                          # versión
+        | (rand >> 64 & 0xFFF) << 64         # rand_a (12 bits)
+        | 0b10 << 62                         # variante RFC
+        | rand & 0x3FFF_FFFF_FFFF_FFFF       # rand_b (62 bits)
+    )
+    return uuid.UUID(int=value)
+
+
+def phone_to_int(phone: Optional[str]) -> Optional[int]:
+    """
+    Normaliza un número de WhatsApp a entero.
+
+    "+54 9 11 1234-5001" -> 5491112345001. Retorna None si no hay dígitos.
+    """
+    if phone is None:
+        return None
+    digits = _NO_DIGITS.sub("", str(phone))
+    return int(digits) if digits else None
+
+
+def int_to_phone(value: Optional[int]) -> Optional[str]:
+    """Formatea el entero guardado como número E.164 ("+5491112345001")."""
+    return None if value is None else f"+{value}"
+
+
+class PhoneNumber(TypeDecorator):
+    """
+    Número de WhatsApp guardado como BIGINT.
+
+    En Python sigue siendo un str E.164; en la BD ocupa 8 bytes y las
+    claves de los índices son más chicas que con VARCHAR.
+
+    El formato original no se conserva: "549..." o "+54 9 ..." se leen
+    como "+549...". Para comparar con un número externo, normalizar
+    ambos con `phone_to_int`.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return phone_to_int(value)
+
+    def process_result_value(self, value, dialect):
+        return int_to_phone(value)
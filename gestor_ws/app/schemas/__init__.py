@@ -1,42 +1,35 @@
 """
 Schemas Pydantic para validación de datos.
+
+Los schemas se importan recién al accederlos (PEP 562): importar un
+submódulo no compila los modelos del resto.
 """
-from app.schemas.erp import (
-    AlumnoSchema,
-    ResponsableSchema,
-    CuotaSchema,
-    PagoConfirmadoEvent,
-    CuotaGeneradaEvent
-)
-from app.schemas.whatsapp import (
-    WhatsAppMessage,
-    WhatsAppResponse,
-    WebhookPayload
-)
-from app.schemas.tickets import (
-    TicketCreate,
-    TicketResponse,
-    TicketResolve,
-    TicketListResponse
-)
+import importlib
 
-__all__ = [
+_LAZY = {
     # ERP
-    "AlumnoSchema",
-    "ResponsableSchema",
-    "CuotaSchema",
-    "PagoConfirmadoEvent",
-    "CuotaGeneradaEvent",
+    "AlumnoSchema": "app.schemas.erp",
+    "ResponsableSchema": "app.schemas.erp",
+    "CuotaSchema": "app.schemas.erp",
+    "PagoConfirmadoEvent": "app.schemas.erp",
+    "CuotaGeneradaEvent": "app.schemas.erp",
     # WhatsApp
-    "WhatsAppMessage",
-    "WhatsAppResponse",
-    "WebhookPayload",
+    "WhatsAppMessage": "app.schemas.whatsapp",
+    "WhatsAppResponse": "app.schemas.whatsapp",
+    "WebhookPayload": "app.schemas.whatsapp",
     # Tickets
-    "TicketCreate",
-    "TicketResponse",
-    "TicketResolve",
-    "TicketListResponse"
-]
+    "TicketCreate": "app.schemas.tickets",
+    "TicketResponse": "app.schemas.tickets",
+    "TicketResolve": "app.schemas.tickets",
+    "TicketListResponse": "app.schemas.tickets",
+}
 
+__all__ = list(_LAZY)
 
 
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,12 +4,18 @@ Servicios de lógica de negocio.
 from app.services.sync_service import SyncService
 from app.services.whatsapp_service import WhatsAppService, get_whatsapp_service
 from app.services.notification_service import NotificationService
+from app.services.vector_store import InstitucionalVectorStore, get_vector_store
+from app.services.interaccion_writer import InteraccionWriter, get_interaccion_writer
 
 __all__ = [
     "SyncService",
     "WhatsAppService",
     "get_whatsapp_service",
-    "NotificationService"
+    "NotificationService",
+    "InstitucionalVectorStore",
+    "get_vector_store",
+    "InteraccionWriter",
+    "get_interaccion_writer"
 ]
 
 
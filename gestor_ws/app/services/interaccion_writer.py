@@ -0,0 +1,211 @@
+"""
+Escritor en lote de interacciones.
+
+Cada mensaje de WhatsApp genera dos filas en `interacciones`. En lugar de
+un commit por mensaje, las filas se encolan y una tarea de fondo las
+persiste en lotes con COPY (asyncpg `copy_records_to_table`): un solo
+fsync por lote en vez de uno por mensaje.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker
+from app.models.interacciones import Interaccion
+from app.models.types import phone_to_int, uuid7
+
+
+logger = logging.getLogger(__name__)
+
+
+MAX_BATCH_SIZE = 500
+MAX_WAIT_SECONDS = 0.2
+
+# Columnas que se escriben con COPY (el resto queda en NULL)
+COPY_COLUMNS = ["id", "whatsapp_from", "tipo", "contenido", "agente", "timestamp"]
+
+# Marca de fin de cola (la encola stop())
+_STOP = None
+
+
+class InteraccionWriter:
+    """
+    Cola de interacciones con un consumidor que escribe en lotes.
+
+    El lote se escribe al juntar MAX_BATCH_SIZE filas o al pasar
+    MAX_WAIT_SECONDS desde la primera fila encolada.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait: float = MAX_WAIT_SECONDS
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[tuple] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Indica si el consumidor está activo."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Arranca el consumidor (requiere un event loop activo)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el consumidor después de persistir lo que quede en la cola."""
+        if self._task is not None:
+            self._queue.put_nowait(_STOP)
+            await self._task
+            self._task = None
+
+    def registrar(
+        self,
+        whatsapp: str,
+        mensaje_entrada: str,
+        respuesta: str,
+        agente: str
+    ) -> None:
+        """
+        Encola el mensaje entrante y la respuesta del bot.
+        
+        Un número sin dígitos se descarta: whatsapp_from es NOT NULL y
+        una fila inválida hace fallar el COPY del lote entero.
+        """
+        ahora = datetime.now(timezone.utc)
+        # COPY no pasa por el tipo PhoneNumber: se normaliza acá
+        numero = phone_to_int(whatsapp)
+        if numero is None:
+            logger.warning(f"Interacción descartada: número de WhatsApp inválido {whatsapp!r}")
+            return
+        whatsapp = numero
+        self._queue.put_nowait(
+            (uuid7(), whatsapp, "mensaje_entrante", mensaje_entrada, "usuario", ahora)
+        )
+        self._queue.put_nowait(
+            (uuid7(), whatsapp, "respuesta", respuesta, agente, ahora)
+        )
+
+    async def _run(self) -> None:
+        """Consume la cola y escribe por lotes hasta recibir _STOP."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            stop = False
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch: list[tuple]) -> None:
+        """
+        Escribe un lote con COPY.
+        
+        Si el COPY falla (una fila rechaza todo el lote), reintenta fila
+        por fila para perder solo las filas inválidas.
+        """
+        try:
+            await self._copy(batch)
+            logger.debug(f"{len(batch)} interacciones registradas")
+            return
+        except Exception as e:
+            logger.warning(
+                f"COPY de {len(batch)} interacciones falló ({e}), "
+                f"reintentando fila por fila"
+            )
+        
+        await self._insert_rows(batch)
+
+    async def _copy(self, batch: list[tuple]) -> None:
+        """COPY del lote sobre la conexión asyncpg."""
+        async with async_session_maker() as session:
+            conn = await session.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                "interacciones",
+                records=batch,
+                columns=COPY_COLUMNS
+            )
+            await session.commit()
+
+    async def _insert_rows(self, batch: list[tuple]) -> None:
+        """Inserta el lote fila por fila, cada una en su SAVEPOINT."""
+        perdidas = 0
+        try:
+            async with async_session_maker() as session:
+                for record in batch:
+                    row = dict(zip(COPY_COLUMNS, record))
+                    try:
+                        async with session.begin_nested():
+                            await log_interactions_bulk(session, [row])
+                    except Exception as e:
+                        perdidas += 1
+                        logger.error(f"Error registrando interacción {row['id']}: {e}")
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error registrando {len(batch)} interacciones: {e}")
+            return
+        
+        if perdidas:
+            logger.error(f"{perdidas} de {len(batch)} interacciones descartadas")
+
+
+async def log_interactions_bulk(session: AsyncSession, rows: list[dict]) -> None:
+    """
+    Inserta varias interacciones en un solo execute.
+
+    SQLAlchemy agrupa las filas en INSERT ... VALUES (...), (...) de
+    varias filas por ida y vuelta (insertmanyvalues) en lugar de un
+    INSERT por objeto. No hace commit: queda a cargo del llamador.
+
+    Args:
+        session: Sesión abierta
+        rows: Mappings como los de `Interaccion.to_dict()`
+    """
+    if rows:
+        await session.execute(insert(Interaccion), rows)
+
+
+# Singleton del escritor
+_interaccion_writer: Optional[InteraccionWriter] = None
+
+
+def get_interaccion_writer() -> InteraccionWriter:
+    """Factory para obtener el escritor de interacciones."""
+    global _interaccion_writer
+    if _interaccion_writer is None:
+        _interaccion_writer = InteraccionWriter()
+    return _interaccion_writer
+
+
+async def close_interaccion_writer() -> None:
+    """Detiene el escritor persistiendo las interacciones pendientes."""
+    global _interaccion_writer
+    if _interaccion_writer:
+        await _interaccion_writer.stop()
+        _interaccion_writer = None
@@ -2,11 +2,12 @@
 Servicio de notificaciones automáticas.
 Gestiona recordatorios de pago y confirmaciones.
 """
+import asyncio
 import logging
 from datetime import date, timedelta
 from typing import Optional
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, insert
 
 from app.database import async_session_maker
 from app.models.cache import CacheCuota, CacheAlumno, CacheResponsable
@@ -18,6 +19,10 @@ from app.adapters.mock_erp_adapter import get_erp_client
 logger = logging.getLogger(__name__)
 
 
+# Recordatorios enviados en simultáneo (ERP + WhatsApp + BD por cada uno)
+MAX_CONCURRENT_RECORDATORIOS = 32
+
+
 class NotificationService:
     """
     Servicio para envío de notificaciones automáticas.
@@ -31,14 +36,16 @@ class NotificationService:
     async def enviar_recordatorio_vencimiento(
         self,
         cuota_id: str,
-        dias_antes: int
+        dias_antes: int,
+        skip_check: bool = False
     ) -> bool:
         """
-        Envía recordatorio de vencimiento de cuota.
+        Envía recordatorio de vencimiento de cuota, buscando sus datos en el ERP.
         
         Args:
             cuota_id: ID de la cuota
             dias_antes: Días antes del vencimiento (7, 3, 1)
+            skip_check: No verificar si ya se envió (el llamador ya filtró)
             
         Returns:
             bool: True si se envió correctamente
@@ -51,52 +58,112 @@ class NotificationService:
                 return False
             
             # Obtener alumno y responsable
-            alumno_id = cuota_data.get("alumno_id")
-            alumno_data = await self.erp.get_alumno(alumno_id)
+            alumno_data = await self.erp.get_alumno(cuota_data.get("alumno_id"))
             if not alumno_data:
                 return False
-            
-            # Buscar responsable con WhatsApp
-            responsables = alumno_data.get("responsables", [])
-            whatsapp = None
-            for resp in responsables:
-                if resp.get("whatsapp"):
-                    whatsapp = resp["whatsapp"]
-                    break
-            
-            if not whatsapp:
-                logger.warning(f"No hay WhatsApp para alumno {alumno_id}")
-                return False
-            
-            # Verificar si ya enviamos esta notificación
-            if await self._ya_enviada(cuota_id, f"recordatorio_d{dias_antes}"):
-                logger.info(f"Recordatorio d{dias_antes} ya enviado para {cuota_id}")
-                return False
-            
-            # Construir mensaje
-            alumno_nombre = f"{alumno_data.get('nombre', '')} {alumno_data.get('apellido', '')}".strip()
-            monto = cuota_data.get("monto", 0)
-            vencimiento = cuota_data.get("fecha_vencimiento", "")
-            link = cuota_data.get("link_pago", "")
-            
-            mensaje = self._construir_mensaje_recordatorio(
-                alumno_nombre, monto, vencimiento, dias_antes, link
-            )
-            
-            # Enviar
-            result = await self.whatsapp.send_message(whatsapp, mensaje)
-            
-            if result.get("success"):
-                # Registrar envío
-                await self._registrar_envio(cuota_id, whatsapp, f"recordatorio_d{dias_antes}")
-                logger.info(f"Recordatorio d{dias_antes} enviado para {cuota_id}")
-                return True
-            
+        except Exception as e:
+            logger.error(f"Error enviando recordatorio: {e}")
             return False
+        
+        return await self.enviar_recordatorio(cuota_data, alumno_data, dias_antes, skip_check)
+    
+    async def enviar_recordatorio(
+        self,
+        cuota_data: dict,
+        alumno_data: dict,
+        dias_antes: int,
+        skip_check: bool = False
+    ) -> bool:
+        """
+        Envía recordatorio de vencimiento con los datos ya obtenidos del ERP.
+        
+        Args:
+            cuota_data: Cuota (como la devuelve get_cuota o get_cuotas_por_vencer)
+            alumno_data: Alumno con sus responsables
+            dias_antes: Días antes del vencimiento (7, 3, 1)
+            skip_check: No verificar si ya se envió (el llamador ya filtró)
             
+        Returns:
+            bool: True si se envió correctamente
+        """
+        try:
+            envio = await self._enviar_recordatorio(cuota_data, alumno_data, dias_antes, skip_check)
         except Exception as e:
             logger.error(f"Error enviando recordatorio: {e}")
             return False
+        if envio is None:
+            return False
+        
+        try:
+            await self._registrar_envios([envio])
+        except Exception as e:
+            logger.error(f"Error registrando recordatorio: {e}")
+            return False
+        return True
+    
+    async def _enviar_recordatorio(
+        self,
+        cuota_data: dict,
+        alumno_data: dict,
+        dias_antes: int,
+        skip_check: bool = False
+    ) -> Optional[dict]:
+        """
+        Envía el recordatorio sin registrarlo en la BD.
+        
+        Returns:
+            dict: Fila de notificaciones_enviadas a insertar, o None si no
+            corresponde enviarlo (sin WhatsApp o ya enviado)
+            
+        Raises:
+            RuntimeError: Si WhatsApp no aceptó el mensaje (o cualquier
+            error del envío): el llamador lo cuenta como error
+        """
+        cuota_id = cuota_data.get("id")
+        alumno_id = cuota_data.get("alumno_id")
+        
+        # Buscar responsable con WhatsApp
+        responsables = alumno_data.get("responsables", [])
+        whatsapp = None
+        for resp in responsables:
+            if resp.get("whatsapp"):
+                whatsapp = resp["whatsapp"]
+                break
+        
+        if not whatsapp:
+            logger.warning(f"No hay WhatsApp para alumno {alumno_id}")
+            return None
+        
+        # Verificar si ya enviamos esta notificación
+        if not skip_check and await self._ya_enviada(cuota_id, f"recordatorio_d{dias_antes}"):
+            logger.info(f"Recordatorio d{dias_antes} ya enviado para {cuota_id}")
+            return None
+        
+        # Construir mensaje
+        alumno_nombre = f"{alumno_data.get('nombre', '')} {alumno_data.get('apellido', '')}".strip()
+        monto = cuota_data.get("monto", 0)
+        vencimiento = cuota_data.get("fecha_vencimiento", "")
+        link = cuota_data.get("link_pago", "")
+        
+        mensaje = self._construir_mensaje_recordatorio(
+            alumno_nombre, monto, vencimiento, dias_antes, link
+        )
+        
+        # Enviar
+        result = await self.whatsapp.send_message(whatsapp, mensaje)
+        
+        if not result.get("success"):
+            raise RuntimeError(
+                f"WhatsApp rechazó el recordatorio d{dias_antes} de {cuota_id}: "
+                f"{result.get('error')}"
+            )
+        
+        logger.info(f"Recordatorio d{dias_antes} enviado para {cuota_id}")
+        return {
+            "erp_cuota_id": cuota_id,
+            "whatsapp_to": whatsapp,
+            "tipo": f"recordatorio_d{dias_antes}"
+        }
     
     async def enviar_confirmacion_pago(
         self,
@@ -166,35 +233,68 @@ class NotificationService:
             dict: Estadísticas del procesamiento
         """
         stats = {"d7": 0, "d3": 0, "d1": 0, "errors": 0}
+        # Envíos a registrar al final en un solo INSERT
+        envios: list[dict] = []
         
         try:
-            # Obtener cuotas por vencer
-            cuotas_d7 = await self.erp.get_cuotas_por_vencer(dias=7)
-            cuotas_d3 = await self.erp.get_cuotas_por_vencer(dias=3)
-            cuotas_d1 = await self.erp.get_cuotas_por_vencer(dias=1)
-            
-            # Procesar recordatorios de 7 días
-            for cuota in cuotas_d7:
-                if await self.enviar_recordatorio_vencimiento(cuota["id"], 7):
-                    stats["d7"] += 1
+            # Obtener cuotas por vencer (las tres consultas en paralelo)
+            cuotas_d7, cuotas_d3, cuotas_d1 = await asyncio.gather(
+                self.erp.get_cuotas_por_vencer(dias=7),
+                self.erp.get_cuotas_por_vencer(dias=3),
+                self.erp.get_cuotas_por_vencer(dias=1)
+            )
             
-            # Procesar recordatorios de 3 días
-            for cuota in cuotas_d3:
-                if await self.enviar_recordatorio_vencimiento(cuota["id"], 3):
-                    stats["d3"] += 1
+            # Alumnos de todas las cuotas en un solo pedido al ERP; las
+            # cuotas ya vienen completas en el listado
+            alumnos = await self.erp.get_alumnos_bulk([
+                cuota["alumno_id"]
+                for cuota in (*cuotas_d7, *cuotas_d3, *cuotas_d1)
+            ])
             
-            # Procesar recordatorios de 1 día
-            for cuota in cuotas_d1:
-                if await self.enviar_recordatorio_vencimiento(cuota["id"], 1):
-                    stats["d1"] += 1
+            sem = asyncio.Semaphore(MAX_CONCURRENT_RECORDATORIOS)
             
-            logger.info(f"Recordatorios procesados: {stats}")
-            return stats
+            async def _enviar(cuota: dict, dias: int) -> Optional[dict]:
+                alumno = alumnos.get(cuota["alumno_id"])
+                if not alumno:
+                    return None
+                async with sem:
+                    return await self._enviar_recordatorio(cuota, alumno, dias, skip_check=True)
             
+            # Un grupo a la vez (7, 3, 1 días); dentro del grupo, en paralelo
+            for dias, cuotas in ((7, cuotas_d7), (3, cuotas_d3), (1, cuotas_d1)):
+                # Una sola consulta por grupo para descartar los ya enviados
+                enviadas = await self._ya_enviadas_bulk(
+                    [cuota["id"] for cuota in cuotas], f"recordatorio_d{dias}"
+                )
+                results = await asyncio.gather(
+                    *(
+                        _enviar(cuota, dias)
+                        for cuota in cuotas
+                        if cuota["id"] not in enviadas
+                    ),
+                    return_exceptions=True
+                )
+                enviados = [r for r in results if isinstance(r, dict)]
+                envios.extend(enviados)
+                stats[f"d{dias}"] += len(enviados)
+                # None (sin WhatsApp o ya enviado) no es error; un envío fallido sí
+                for r in results:
+                    if isinstance(r, BaseException):
+                        logger.error(f"Error enviando recordatorio: {r}")
+                        stats["errors"] += 1
         except Exception as e:
             logger.error(f"Error procesando recordatorios: {e}")
             stats["errors"] += 1
-            return stats
+        
+        # Lo enviado se registra aunque el proceso se haya cortado a mitad
+        try:
+            await self._registrar_envios(envios)
+        except Exception as e:
+            logger.error(f"Error registrando {len(envios)} recordatorios: {e}")
+            stats["errors"] += 1
+        
+        logger.info(f"Recordatorios procesados: {stats}")
+        return stats
     
     def _construir_mensaje_recordatorio(
         self,
@@ -241,6 +341,27 @@ class NotificationService:
             )
             return result.scalar_one_or_none() is not None
     
+    async def _ya_enviadas_bulk(self, cuota_ids: list[str], tipo: str) -> set[str]:
+        """Retorna cuáles de las cuotas ya tienen la notificación enviada."""
+        if not cuota_ids:
+            return set()
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(NotificacionEnviada.erp_cuota_id).where(
+                    NotificacionEnviada.tipo == tipo,
+                    NotificacionEnviada.erp_cuota_id.in_(cuota_ids)
+                )
+            )
+            return {row[0] for row in result.all()}
+    
+    async def _registrar_envios(self, envios: list[dict]) -> None:
+        """Registra varias notificaciones enviadas en un solo INSERT."""
+        if not envios:
+            return
+        async with async_session_maker() as session:
+            await session.execute(insert(NotificacionEnviada), envios)
+            await session.commit()
+    
     async def _registrar_envio(
         self,
         cuota_id: str,
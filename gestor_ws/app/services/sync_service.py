@@ -3,10 +3,11 @@ Servicio de sincronización con el ERP.
 Mantiene el cache actualizado con datos del ERP.
 """
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, insert, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session_maker
@@ -18,6 +19,129 @@ from app.adapters.mock_erp_adapter import get_erp_client
 logger = logging.getLogger(__name__)
 
 
+# ============================================================
+# CAMPOS DEL CACHE POR ENTIDAD
+# ============================================================
+
+def _campos_responsable(data: dict) -> dict:
+    """Columnas de cache_responsables a partir de los datos del ERP."""
+    return {
+        "nombre": data.get("nombre"),
+        "apellido": data.get("apellido"),
+        "whatsapp": data.get("whatsapp"),
+        "email": data.get("email")
+    }
+
+
+def _campos_alumno(data: dict) -> dict:
+    """Columnas de cache_alumnos a partir de los datos del ERP."""
+    return {
+        "nombre": data.get("nombre"),
+        "apellido": data.get("apellido"),
+        "grado": data.get("grado"),
+        "erp_responsable_id": data.get("responsable_id")
+    }
+
+
+def _campos_cuota(data: dict) -> dict:
+    """Columnas de cache_cuotas a partir de los datos del ERP."""
+    return {
+        "erp_alumno_id": data.get("alumno_id"),
+        "monto": data.get("monto"),
+        "fecha_vencimiento": data.get("fecha_vencimiento"),
+        "estado": data.get("estado"),
+        "link_pago": data.get("link_pago"),
+        "fecha_pago": data.get("fecha_pago")
+    }
+
+
+async def _registrar_logs(sess: AsyncSession, rows: list[dict]) -> None:
+    """
+    Inserta filas de sincronizaciones_log con un INSERT en lote.
+
+    El log es append-only: no hace falta pasar por la unidad de trabajo
+    del ORM (identity map, flush) como con `sess.add()`.
+    """
+    if rows:
+        await sess.execute(insert(SincronizacionLog), rows)
+
+
+# tipo -> (modelo, columna con el ID del ERP, campos)
+SYNC_TARGETS = {
+    "responsable": (CacheResponsable, "erp_responsable_id", _campos_responsable),
+    "alumno": (CacheAlumno, "erp_alumno_id", _campos_alumno),
+    "cuota": (CacheCuota, "erp_cuota_id", _campos_cuota),
+}
+
+
+async def _upsert_cache(sess: AsyncSession, tipo: str, erp_id: str, data: dict):
+    """
+    Crea o actualiza un registro del cache en un solo statement.
+
+    INSERT ... ON CONFLICT (erp_id) DO UPDATE ... RETURNING: sin el SELECT
+    previo. `xmax = 0` solo vale en la fila recién insertada, así se
+    distingue create de update.
+
+    Returns:
+        tuple: (registro, "create" | "update")
+    """
+    model, key, campos_de = SYNC_TARGETS[tipo]
+    campos = campos_de(data)
+    stmt = (
+        pg_insert(model)
+        .values(**{key: erp_id}, **campos)
+        .on_conflict_do_update(
+            index_elements=[getattr(model, key)],
+            set_={**campos, "ultima_sync": func.now()}
+        )
+        .returning(model, literal_column("xmax = 0").label("creado"))
+        .execution_options(populate_existing=True)
+    )
+    row, creado = (await sess.execute(stmt)).one()
+    return row, "create" if creado else "update"
+
+
+# Filas por INSERT multi-row (asyncpg admite hasta 32767 parámetros)
+UPSERT_CHUNK_SIZE = 1000
+
+
+async def _upsert_cache_many(sess: AsyncSession, tipo: str, datos: dict[str, dict]) -> dict[str, str]:
+    """
+    Crea o actualiza varios registros del cache de un mismo tipo.
+
+    Un INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE por tanda:
+    un webhook concurrente que inserte el mismo ID no rompe el lote.
+    Las filas van ordenadas por ID para tomar los locks siempre en el
+    mismo orden entre lotes concurrentes.
+
+    Args:
+        datos: ID del ERP -> datos (sin IDs repetidos: ON CONFLICT no
+            puede actualizar dos veces la misma fila en un statement)
+
+    Returns:
+        dict: ID del ERP -> "create" | "update"
+    """
+    model, key, campos_de = SYNC_TARGETS[tipo]
+    key_col = getattr(model, key)
+    rows = [{key: erp_id, **campos_de(data)} for erp_id, data in sorted(datos.items())]
+
+    acciones: dict[str, str] = {}
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = pg_insert(model).values(rows[i:i + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key_col],
+            set_={
+                **{campo: stmt.excluded[campo] for campo in rows[0] if campo != key},
+                "ultima_sync": func.now()
+            }
+        ).returning(key_col, literal_column("xmax = 0").label("creado"))
+        result = await sess.execute(stmt)
+        acciones.update(
+            (erp_id, "create" if creado else "update") for erp_id, creado in result.all()
+        )
+    return acciones
+
+
 class SyncService:
     """
     Servicio para sincronizar datos del ERP al cache local.
@@ -45,45 +169,17 @@ class SyncService:
             CacheResponsable: Registro actualizado/creado
         """
         async def _sync(sess: AsyncSession):
-            # Buscar existente
-            result = await sess.execute(
-                select(CacheResponsable).where(
-                    CacheResponsable.erp_responsable_id == erp_responsable_id
-                )
-            )
-            responsable = result.scalar_one_or_none()
-            
-            if responsable:
-                # Actualizar
-                responsable.nombre = data.get("nombre")
-                responsable.apellido = data.get("apellido")
-                responsable.whatsapp = data.get("whatsapp")
-                responsable.email = data.get("email")
-                responsable.ultima_sync = datetime.now()
-                accion = "update"
-            else:
-                # Crear
-                responsable = CacheResponsable(
-                    erp_responsable_id=erp_responsable_id,
-                    nombre=data.get("nombre"),
-                    apellido=data.get("apellido"),
-                    whatsapp=data.get("whatsapp"),
-                    email=data.get("email")
-                )
-                sess.add(responsable)
-                accion = "create"
+            responsable, accion = await _upsert_cache(sess, "responsable", erp_responsable_id, data)
             
             # Log de sincronización
-            log = SincronizacionLog(
-                tipo="responsable",
-                erp_id=erp_responsable_id,
-                accion=accion,
-                payload=data
-            )
-            sess.add(log)
+            await _registrar_logs(sess, [{
+                "tipo": "responsable",
+                "erp_id": erp_responsable_id,
+                "accion": accion,
+                "payload": data
+            }])
             
             await sess.commit()
-            await sess.refresh(responsable)
             
             logger.info(f"Responsable {erp_responsable_id} sincronizado ({accion})")
             return responsable
@@ -112,41 +208,17 @@ class SyncService:
             CacheAlumno: Registro actualizado/creado
         """
         async def _sync(sess: AsyncSession):
-            result = await sess.execute(
-                select(CacheAlumno).where(
-                    CacheAlumno.erp_alumno_id == erp_alumno_id
-                )
-            )
-            alumno = result.scalar_one_or_none()
+            alumno, accion = await _upsert_cache(sess, "alumno", erp_alumno_id, data)
             
-            if alumno:
-                alumno.nombre = data.get("nombre")
-                alumno.apellido = data.get("apellido")
-                alumno.grado = data.get("grado")
-                alumno.erp_responsable_id = data.get("responsable_id")
-                alumno.ultima_sync = datetime.now()
-                accion = "update"
-            else:
-                alumno = CacheAlumno(
-                    erp_alumno_id=erp_alumno_id,
-                    nombre=data.get("nombre"),
-                    apellido=data.get("apellido"),
-                    grado=data.get("grado"),
-                    erp_responsable_id=data.get("responsable_id")
-                )
-                sess.add(alumno)
-                accion = "create"
-            
-            log = SincronizacionLog(
-                tipo="alumno",
-                erp_id=erp_alumno_id,
-                accion=accion,
-                payload=data
-            )
-            sess.add(log)
+            # Log de sincronización
+            await _registrar_logs(sess, [{
+                "tipo": "alumno",
+                "erp_id": erp_alumno_id,
+                "accion": accion,
+                "payload": data
+            }])
             
             await sess.commit()
-            await sess.refresh(alumno)
             
             logger.info(f"Alumno {erp_alumno_id} sincronizado ({accion})")
             return alumno
@@ -175,45 +247,17 @@ class SyncService:
             CacheCuota: Registro actualizado/creado
         """
         async def _sync(sess: AsyncSession):
-            result = await sess.execute(
-                select(CacheCuota).where(
-                    CacheCuota.erp_cuota_id == erp_cuota_id
-                )
-            )
-            cuota = result.scalar_one_or_none()
+            cuota, accion = await _upsert_cache(sess, "cuota", erp_cuota_id, data)
             
-            if cuota:
-                cuota.erp_alumno_id = data.get("alumno_id")
-                cuota.monto = data.get("monto")
-                cuota.fecha_vencimiento = data.get("fecha_vencimiento")
-                cuota.estado = data.get("estado")
-                cuota.link_pago = data.get("link_pago")
-                cuota.fecha_pago = data.get("fecha_pago")
-                cuota.ultima_sync = datetime.now()
-                accion = "update"
-            else:
-                cuota = CacheCuota(
-                    erp_cuota_id=erp_cuota_id,
-                    erp_alumno_id=data.get("alumno_id"),
-                    monto=data.get("monto"),
-                    fecha_vencimiento=data.get("fecha_vencimiento"),
-                    estado=data.get("estado"),
-                    link_pago=data.get("link_pago"),
-                    fecha_pago=data.get("fecha_pago")
-                )
-                sess.add(cuota)
-                accion = "create"
-            
-            log = SincronizacionLog(
-                tipo="cuota",
-                erp_id=erp_cuota_id,
-                accion=accion,
-                payload=data
-            )
-            sess.add(log)
+            # Log de sincronización
+            await _registrar_logs(sess, [{
+                "tipo": "cuota",
+                "erp_id": erp_cuota_id,
+                "accion": accion,
+                "payload": data
+            }])
             
             await sess.commit()
-            await sess.refresh(cuota)
             
             logger.info(f"Cuota {erp_cuota_id} sincronizada ({accion})")
             return cuota
@@ -224,6 +268,52 @@ class SyncService:
             async with async_session_maker() as sess:
                 return await _sync(sess)
     
+    async def sync_batch(self, items: list[tuple[str, str, dict]]) -> dict[str, int]:
+        """
+        Sincroniza muchas entidades en una sola sesión y transacción.
+        
+        Un upsert multi-row por tipo (ver `_upsert_cache_many`) y un único
+        commit al final (en lugar de sesión + commit + refresh por entidad).
+        Si un ID se repite en el lote, quedan los últimos datos.
+        
+        Args:
+            items: Lista de (tipo, erp_id, datos); tipo es "responsable",
+                "alumno" o "cuota"
+            
+        Returns:
+            dict: Cantidad de registros creados y actualizados
+        """
+        stats = {"create": 0, "update": 0}
+        if not items:
+            return stats
+        
+        # tipo -> ID del ERP -> datos (el último gana)
+        por_tipo: dict[str, dict[str, dict]] = {}
+        for tipo, erp_id, data in items:
+            por_tipo.setdefault(tipo, {})[erp_id] = data
+        
+        logs: list[dict] = []
+        
+        async with async_session_maker() as session:
+            # Tipos en orden fijo: mismo orden de locks en lotes concurrentes
+            for tipo in sorted(por_tipo):
+                datos = por_tipo[tipo]
+                acciones = await _upsert_cache_many(session, tipo, datos)
+                for erp_id, accion in acciones.items():
+                    stats[accion] += 1
+                    logs.append({
+                        "tipo": tipo,
+                        "erp_id": erp_id,
+                        "accion": accion,
+                        "payload": datos[erp_id]
+                    })
+            
+            await _registrar_logs(session, logs)
+            await session.commit()
+        
+        logger.info(f"{len(items)} entidades sincronizadas en lote ({stats})")
+        return stats
+    
     async def actualizar_estado_cuota(
         self,
         erp_cuota_id: str,
@@ -249,17 +339,16 @@ class SyncService:
             
             if cuota:
                 cuota.estado = estado
-                cuota.ultima_sync = datetime.now()
+                cuota.ultima_sync = datetime.now(timezone.utc)
                 if estado == "pagada":
-                    cuota.fecha_pago = datetime.now()
+                    cuota.fecha_pago = datetime.now(timezone.utc)
                 
-                log = SincronizacionLog(
-                    tipo="cuota",
-                    erp_id=erp_cuota_id,
-                    accion="update",
-                    payload={"estado": estado}
-                )
-                session.add(log)
+                await _registrar_logs(session, [{
+                    "tipo": "cuota",
+                    "erp_id": erp_cuota_id,
+                    "accion": "update",
+                    "payload": {"estado": estado}
+                }])
                 
                 await session.commit()
                 await session.refresh(cuota)
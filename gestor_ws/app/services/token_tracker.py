@@ -12,6 +12,9 @@ from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
+# Logger dedicado: setup_logging le cuelga el handler de logs/token_usage.log
+token_logger = logging.getLogger("token_usage")
+
 # Context variable para tracking thread-safe
 _current_session: ContextVar[Optional["TokenSession"]] = ContextVar("_current_session", default=None)
 
@@ -178,11 +181,13 @@ class TokenTracker:
         session.total_completion_tokens += completion_tokens
         session.total_tokens += total_tokens
         
-        logger.debug(
-            f"[TOKEN_TRACKER] Inferencia registrada: {node_name} "
-            f"({inference_type}) - {total_tokens} tokens "
-            f"(prompt: {prompt_tokens}, completion: {completion_tokens})"
-        )
+        # Camino caliente (una vez por llamada al LLM): solo formatear si se va a loguear
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"[TOKEN_TRACKER] Inferencia registrada: {node_name} "
+                f"({inference_type}) - {total_tokens} tokens "
+                f"(prompt: {prompt_tokens}, completion: {completion_tokens})"
+            )
     
     def finalize_session(self) -> Optional[TokenSession]:
         """
@@ -250,7 +255,14 @@ class TokenTracker:
         Args:
             session: Sesión finalizada
         """
-        # Preparar datos para log JSON
+        if token_logger.isEnabledFor(logging.INFO):
+            self._log_session_json(session)
+        
+        if logger.isEnabledFor(logging.INFO):
+            self._log_session_text(session)
+    
+    def _log_session_json(self, session: TokenSession) -> None:
+        """Log estructurado (JSON) hacia logs/token_usage.log."""
         log_data = {
             "event": "token_usage_summary",
             "query_id": session.query_id,
@@ -283,12 +295,13 @@ class TokenTracker:
             }
         }
         
-        # Log estructurado (JSON)
-        logger.info(
+        # El prefijo lo usan los scripts de análisis
+        token_logger.info(
             f"[TOKEN_USAGE] {json.dumps(log_data, ensure_ascii=False)}"
         )
-        
-        # Log legible para humanos
+    
+    def _log_session_text(self, session: TokenSession) -> None:
+        """Log legible para humanos."""
         logger.info(
             f"\n{'='*60}\n"
             f"TOKEN USAGE SUMMARY - Query ID: {session.query_id}\n"
@@ -0,0 +1,268 @@
+"""
+BD Vectorial para información institucional (pgvector).
+
+Guarda fragmentos de información del colegio con su embedding en
+PostgreSQL (extensión pgvector, índice HNSW) y resuelve búsquedas
+semánticas para el Especialista Institucional.
+
+Los embeddings se obtienen de un endpoint compatible con OpenAI
+(`POST /v1/embeddings`, también expuesto por Ollama) y se cachean en
+memoria para no re-embeber consultas idénticas. Los embeddings de los
+fragmentos se calculan una sola vez al cargarlos
+(`python -m app.cli ingest-info`) y quedan guardados en la tabla.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+import httpx
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_session_maker
+from app.http import get_shared_async_client
+
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDINGS_CACHE_MAXSIZE = 4096
+
+
+# SQL para crear la tabla vectorial (requiere la extensión pgvector)
+CREATE_VECTOR_STORE_SQL = f"""
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS info_institucional (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    clave VARCHAR(100) UNIQUE NOT NULL,
+    seccion VARCHAR(50) NOT NULL,
+    contenido TEXT NOT NULL,
+    embedding vector({settings.EMBEDDINGS_DIMENSIONS}) NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_info_institucional_embedding
+    ON info_institucional USING hnsw (embedding vector_cosine_ops);
+"""
+
+SEARCH_SQL = text("""
+    SELECT seccion, contenido, 1 - (embedding <=> CAST(:embedding AS vector)) AS score
+    FROM info_institucional
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :k
+""")
+
+UPSERT_SQL = text("""
+    INSERT INTO info_institucional (clave, seccion, contenido, embedding)
+    VALUES (:clave, :seccion, :contenido, CAST(:embedding AS vector))
+    ON CONFLICT (clave) DO UPDATE SET
+        seccion = EXCLUDED.seccion,
+        contenido = EXCLUDED.contenido,
+        embedding = EXCLUDED.embedding,
+        updated_at = NOW()
+""")
+
+
+def _vector_literal(embedding: list[float]) -> str:
+    """pgvector acepta el literal '[x1,x2,...]'."""
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def _texto(value: Any) -> str:
+    """Aplana un valor de la info institucional a texto."""
+    if isinstance(value, dict):
+        return "; ".join(
+            f"{k.replace('_', ' ')}: {_texto(v)}" for k, v in value.items()
+        )
+    if isinstance(value, list):
+        return "; ".join(_texto(v) for v in value)
+    return str(value)
+
+
+def fragmentos_institucionales(info: dict) -> list[dict]:
+    """
+    Divide la información institucional en fragmentos para embeber.
+
+    Un fragmento por cada entrada de segundo nivel
+    ("horarios.primaria", "contacto.email", ...).
+
+    Args:
+        info: Dict sección -> datos (ej: MOCK_INFO_INSTITUCIONAL)
+
+    Returns:
+        list[dict]: Fragmentos con clave, seccion y contenido
+    """
+    fragmentos = []
+    for seccion, datos in info.items():
+        items = datos.items() if isinstance(datos, dict) else [(seccion, datos)]
+        for nombre, valor in items:
+            fragmentos.append({
+                "clave": f"{seccion}.{nombre}",
+                "seccion": seccion,
+                "contenido": f"{seccion.title()} - {nombre.replace('_', ' ')}: {_texto(valor)}"
+            })
+    return fragmentos
+
+
+class InstitucionalVectorStore:
+    """
+    Búsqueda semántica sobre la información institucional.
+
+    Usa pgvector con índice HNSW (distancia coseno) y cachea los
+    embeddings de las consultas en un LRU en memoria.
+    """
+
+    def __init__(
+        self,
+        embeddings_url: Optional[str] = None,
+        embeddings_model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        """
+        Inicializa el vector store.
+
+        Args:
+            embeddings_url: URL base del endpoint de embeddings (OpenAI-compatible)
+            embeddings_model: Modelo de embeddings
+            api_key: API key del endpoint (opcional para Ollama)
+            client: Cliente HTTP a usar. Por defecto, el compartido del proceso
+        """
+        self.embeddings_url = (embeddings_url or settings.EMBEDDINGS_URL).rstrip("/")
+        self.embeddings_model = embeddings_model or settings.EMBEDDINGS_MODEL
+        self.api_key = api_key or settings.EMBEDDINGS_API_KEY or settings.OPENAI_API_KEY
+        self._client = client or get_shared_async_client()
+        self._headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            self._headers["Authorization"] = f"Bearer {self.api_key}"
+        self._embeddings_cache: "OrderedDict[str, list[float]]" = OrderedDict()
+
+    async def close(self) -> None:
+        """
+        Libera el cache de embeddings.
+
+        El cliente HTTP no se cierra: es compartido (o inyectado) y lo
+        cierra quien lo creó.
+        """
+        self._embeddings_cache.clear()
+
+    async def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embebe varios textos en un solo request."""
+        response = await self._client.post(
+            f"{self.embeddings_url}/v1/embeddings",
+            json={"model": self.embeddings_model, "input": texts},
+            headers=self._headers
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda d: d["index"])
+        return [d["embedding"] for d in data]
+
+    async def embed(self, query: str) -> list[float]:
+        """
+        Obtiene el embedding de una consulta, usando el cache si existe.
+
+        La clave del cache es la consulta normalizada; al endpoint se
+        envía el texto original.
+
+        Args:
+            query: Texto a embeber
+
+        Returns:
+            list[float]: Vector de embedding
+        """
+        key = query.strip().lower()
+        cached = self._embeddings_cache.get(key)
+        if cached is not None:
+            self._embeddings_cache.move_to_end(key)
+            return cached
+
+        embedding = (await self._embed_texts([query.strip()]))[0]
+
+        self._embeddings_cache[key] = embedding
+        if len(self._embeddings_cache) > EMBEDDINGS_CACHE_MAXSIZE:
+            self._embeddings_cache.popitem(last=False)
+
+        return embedding
+
+    async def search(self, query: str, k: int = 5) -> list[dict]:
+        """
+        Busca los k fragmentos más similares a la consulta.
+
+        Args:
+            query: Consulta en lenguaje natural
+            k: Cantidad de resultados
+
+        Returns:
+            list[dict]: Fragmentos con seccion, contenido y score
+        """
+        embedding = await self.embed(query)
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                SEARCH_SQL,
+                {"embedding": _vector_literal(embedding), "k": k}
+            )
+            rows = result.mappings().all()
+
+        return [dict(row) for row in rows]
+
+    async def create_schema(self) -> None:
+        """Crea la extensión, la tabla y el índice HNSW si no existen."""
+        # asyncpg no acepta varios comandos en un mismo statement
+        statements = [s.strip() for s in CREATE_VECTOR_STORE_SQL.split(";") if s.strip()]
+        async with async_session_maker.begin() as session:
+            for statement in statements:
+                await session.execute(text(statement))
+
+    async def ingest(self, fragmentos: list[dict]) -> int:
+        """
+        Embebe y guarda (upsert por clave) los fragmentos.
+
+        Args:
+            fragmentos: Dicts con clave, seccion y contenido
+
+        Returns:
+            int: Cantidad de fragmentos guardados
+        """
+        if not fragmentos:
+            return 0
+
+        embeddings = await self._embed_texts([f["contenido"] for f in fragmentos])
+        rows = [
+            {**f, "embedding": _vector_literal(embedding)}
+            for f, embedding in zip(fragmentos, embeddings)
+        ]
+
+        async with async_session_maker.begin() as session:
+            await session.execute(UPSERT_SQL, rows)
+
+        logger.info(f"{len(rows)} fragmentos institucionales guardados")
+        return len(rows)
+
+
+# Singleton del vector store
+_vector_store: Optional[InstitucionalVectorStore] = None
+
+
+def get_vector_store() -> Optional[InstitucionalVectorStore]:
+    """
+    Factory para obtener el vector store institucional.
+
+    Returns:
+        InstitucionalVectorStore o None si no está habilitado
+    """
+    global _vector_store
+    if not settings.VECTOR_STORE_ENABLED:
+        return None
+    if _vector_store is None:
+        _vector_store = InstitucionalVectorStore()
+    return _vector_store
+
+
+async def close_vector_store() -> None:
+    """Cierra el vector store."""
+    global _vector_store
+    if _vector_store:
+        await _vector_store.close()
+        _vector_store = None
@@ -8,6 +8,7 @@ from typing import Optional
 import httpx
 
 from app.config import settings
+from app.http import HTTP2_AVAILABLE
 
 
 logger = logging.getLogger(__name__)
@@ -42,7 +43,14 @@ class WhatsAppService:
                     "Authorization": f"Bearer {self.token}",
                     "Content-Type": "application/json"
                 },
-                timeout=30.0
+                timeout=30.0,
+                # Una sola conexión TLS multiplexada hacia graph.facebook.com
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=100,
+                    keepalive_expiry=60.0
+                )
             )
         return self._client
     
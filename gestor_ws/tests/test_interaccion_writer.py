@@ -0,0 +1,46 @@
+"""
+Tests para el escritor en lote de interacciones.
+"""
+from unittest.mock import AsyncMock
+
+from app.services.interaccion_writer import InteraccionWriter
+
+
+class TestInteraccionWriter:
+    """Tests de encolado y escritura del lote."""
+
+    def test_registrar_normaliza_numero(self):
+        """Test que registrar encola las dos filas con el número como entero."""
+        writer = InteraccionWriter()
+        writer.registrar("+54 9 11 1234-5001", "hola", "buen día", "asistente")
+
+        assert writer._queue.qsize() == 2
+        assert writer._queue.get_nowait()[1] == 5491112345001
+
+    def test_registrar_descarta_numero_sin_digitos(self):
+        """Test que un número sin dígitos no llega a la cola."""
+        writer = InteraccionWriter()
+        writer.registrar("whatsapp:desconocido", "hola", "buen día", "asistente")
+
+        assert writer._queue.empty()
+
+    async def test_flush_reintenta_fila_por_fila_si_falla_copy(self):
+        """Test que un COPY fallido no descarta el lote."""
+        writer = InteraccionWriter()
+        writer._copy = AsyncMock(side_effect=Exception("null value in column"))
+        writer._insert_rows = AsyncMock()
+        batch = [("id", 5491112345001, "respuesta", "hola", "asistente", None)]
+
+        await writer._flush(batch)
+
+        writer._insert_rows.assert_awaited_once_with(batch)
+
+    async def test_flush_sin_error_no_reintenta(self):
+        """Test que con COPY exitoso no hay reintento."""
+        writer = InteraccionWriter()
+        writer._copy = AsyncMock()
+        writer._insert_rows = AsyncMock()
+
+        await writer._flush([("id", 1, "respuesta", "hola", "asistente", None)])
+
+        writer._insert_rows.assert_not_awaited()
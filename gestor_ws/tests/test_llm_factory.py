@@ -186,3 +186,31 @@ class TestFactorySwitch:
 
 
 
+
+
+class TestTrackedLLMStream:
+    """Tests del registro de tokens en streaming."""
+    
+    async def test_stream_cerrado_antes_estima_tokens(self):
+        """Test que un stream cortado antes del usage registra tokens estimados."""
+        from langchain_core.language_models import GenericFakeChatModel
+        from langchain_core.messages import AIMessage
+        from app.llm.tracked_llm import TrackedLLM
+        
+        base = GenericFakeChatModel(messages=iter([AIMessage(content='{"a": 1} resto')]))
+        llm = TrackedLLM(base, node_name="institucional_planificar")
+        encoder = MagicMock()
+        encoder.encode.side_effect = lambda text: text.split()
+        
+        with patch('app.llm.tracked_llm._get_encoder', return_value=encoder), \
+                patch('app.llm.tracked_llm.settings') as mock_settings, \
+                patch('app.llm.tracked_llm.token_tracker') as mock_tracker:
+            mock_settings.TOKEN_FALLBACK_ENABLED = False
+            stream = llm.astream("planificar consulta")
+            async for _ in stream:
+                break
+            await stream.aclose()
+        
+        kwargs = mock_tracker.record_inference.call_args.kwargs
+        assert kwargs["prompt_tokens"] == 2
+        assert kwargs["total_tokens"] > 2
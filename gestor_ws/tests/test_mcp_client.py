@@ -0,0 +1,191 @@
+"""
+Tests para el cliente MCP.
+"""
+import json
+
+import httpx
+
+from app.mcp_client import CIRCUIT_FAILURE_THRESHOLD, MAX_POST_ATTEMPTS, MCPClient
+
+
+def _mock_client(handler) -> httpx.AsyncClient:
+    """Cliente HTTP con transport en memoria."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestMCPClient:
+    """Tests del cliente MCP con un cliente HTTP inyectado."""
+
+    async def test_call_tool_usa_cliente_inyectado(self):
+        """Test que call_tool envía el request por el cliente inyectado."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"success": True, "data": {"ok": 1}})
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            result = await mcp.call_tool("consultar_estado_cuenta", {"whatsapp": "+5491112345001"})
+
+        assert result.success is True
+        assert result.data == {"ok": 1}
+        assert str(requests[0].url) == "http://mcp:8003/tools/consultar_estado_cuenta/call"
+        assert requests[0].headers["content-type"] == "application/json"
+        assert json.loads(requests[0].content)["arguments"] == {"whatsapp": "+5491112345001"}
+
+    async def test_close_no_cierra_cliente_inyectado(self):
+        """Test que close() deja abierto el cliente HTTP de quien lo creó."""
+        async with _mock_client(lambda request: httpx.Response(200)) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            await mcp.close()
+
+            assert not http_client.is_closed
+
+
+class TestMCPClientRetry:
+    """Tests de reintentos y circuit breaker."""
+
+    async def test_tool_de_lectura_se_reintenta(self):
+        """Test que una tool de solo lectura se reintenta ante ReadTimeout."""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            raise httpx.ReadTimeout("timeout", request=request)
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            result = await mcp.call_tool("consultar_estado_cuenta", {"whatsapp": "+5491112345001"})
+
+        assert result.success is False
+        assert len(attempts) == MAX_POST_ATTEMPTS
+
+    async def test_tool_con_efectos_no_se_reintenta(self):
+        """Test que crear_ticket no se repite si el servidor ya recibió el request."""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            return httpx.Response(503)
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            result = await mcp.call_tool("crear_ticket", {"motivo": "reclamo"})
+
+        assert result.success is False
+        assert len(attempts) == 1
+
+    async def test_tool_con_efectos_se_reintenta_si_no_se_envio(self):
+        """Test que un error de conexión se reintenta aunque la tool tenga efectos."""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            if len(attempts) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"success": True, "data": {}})
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            result = await mcp.call_tool("crear_ticket", {"motivo": "reclamo"})
+
+        assert result.success is True
+        assert len(attempts) == 2
+
+    async def test_circuito_se_abre_tras_fallos_seguidos(self):
+        """Test que tras CIRCUIT_FAILURE_THRESHOLD fallos no se llama al servidor."""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            return httpx.Response(500)
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+                await mcp.call_tool("crear_ticket")
+
+            assert mcp.circuit_open
+            result = await mcp.call_tool("crear_ticket")
+
+        assert result.success is False
+        assert "circuit open" in result.error
+        assert len(attempts) == CIRCUIT_FAILURE_THRESHOLD
+
+    async def test_exito_reinicia_contador_de_fallos(self):
+        """Test que una respuesta exitosa reinicia los fallos consecutivos."""
+        statuses = [500] * (CIRCUIT_FAILURE_THRESHOLD - 1) + [200] + [500] * (CIRCUIT_FAILURE_THRESHOLD - 1)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(statuses.pop(0), json={"success": True})
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            for _ in range(2 * CIRCUIT_FAILURE_THRESHOLD - 1):
+                await mcp.call_tool("crear_ticket")
+
+            assert not mcp.circuit_open
+
+
+class TestMCPClientBatch:
+    """Tests del batch JSON-RPC."""
+
+    async def test_batch_empareja_respuestas_por_id(self):
+        """Test que las respuestas desordenadas se asignan por id."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls = json.loads(request.content)
+            replies = [
+                {"jsonrpc": "2.0", "id": call["id"], "result": {"success": True, "data": call["params"]["name"]}}
+                for call in calls
+            ]
+            return httpx.Response(200, json=list(reversed(replies)))
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            results = await mcp.call_tools_mcp_batch([
+                ("buscar_horarios", {}),
+                ("buscar_contacto", {}),
+                ("buscar_calendario", {}),
+            ])
+
+        assert [r.data for r in results] == ["buscar_horarios", "buscar_contacto", "buscar_calendario"]
+
+    async def test_batch_id_faltante(self):
+        """Test que una llamada sin respuesta en el batch queda como error."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            call = json.loads(request.content)[0]
+            return httpx.Response(200, json=[
+                {"jsonrpc": "2.0", "id": call["id"], "result": {"success": True, "data": 1}}
+            ])
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            results = await mcp.call_tools_mcp_batch([("buscar_horarios", {}), ("buscar_contacto", {})])
+
+        assert results[0].success is True
+        assert results[1].success is False
+        assert results[1].error == "Sin respuesta en el batch"
+
+    async def test_batch_rechazado_cae_a_llamadas_individuales(self):
+        """Test que si el servidor rechaza el array se llama tool por tool."""
+        bodies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            bodies.append(body)
+            if isinstance(body, list):
+                return httpx.Response(400, json={"detail": "batch no soportado"})
+            return httpx.Response(200, json={
+                "jsonrpc": "2.0",
+                "id": body["id"],
+                "result": {"success": True, "data": body["params"]["name"]}
+            })
+
+        async with _mock_client(handler) as http_client:
+            mcp = MCPClient(base_url="http://mcp:8003", mock_mode=False, client=http_client)
+            results = await mcp.call_tools_mcp_batch([("buscar_horarios", {}), ("buscar_contacto", {})])
+
+        assert [r.data for r in results] == ["buscar_horarios", "buscar_contacto"]
+        assert isinstance(bodies[0], list)
+        assert len(bodies) == 3
@@ -0,0 +1,41 @@
+"""
+Tests para el servicio de notificaciones.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.notification_service import NotificationService
+
+
+def _cuota(cuota_id: str, alumno_id: str) -> dict:
+    return {"id": cuota_id, "alumno_id": alumno_id, "monto": 45000, "fecha_vencimiento": "2026-03-10"}
+
+
+class TestRecordatoriosPendientes:
+    """Tests del procesamiento de recordatorios."""
+    
+    async def test_envio_fallido_cuenta_como_error(self):
+        """Test que un envío rechazado suma a errors y sin WhatsApp no."""
+        service = NotificationService.__new__(NotificationService)
+        service.erp = MagicMock()
+        service.erp.get_cuotas_por_vencer = AsyncMock(side_effect=[
+            [_cuota("CUO-1", "ALU-1"), _cuota("CUO-2", "ALU-2"), _cuota("CUO-3", "ALU-3")],
+            [],
+            []
+        ])
+        service.erp.get_alumnos_bulk = AsyncMock(return_value={
+            "ALU-1": {"nombre": "Ana", "responsables": [{"whatsapp": "+5491100000001"}]},
+            "ALU-2": {"nombre": "Luis", "responsables": [{"whatsapp": "+5491100000002"}]},
+            "ALU-3": {"nombre": "Sol", "responsables": []},
+        })
+        service.whatsapp = MagicMock()
+        service.whatsapp.send_message = AsyncMock(side_effect=lambda to, msg: {
+            "success": to.endswith("1"), "error": "rate limit"
+        })
+        service._ya_enviadas_bulk = AsyncMock(return_value=set())
+        service._registrar_envios = AsyncMock()
+        
+        stats = await service.procesar_recordatorios_pendientes()
+        
+        assert stats == {"d7": 1, "d3": 0, "d1": 0, "errors": 1}
+        service._registrar_envios.assert_awaited_once()
+        assert [e["erp_cuota_id"] for e in service._registrar_envios.call_args.args[0]] == ["CUO-1"]
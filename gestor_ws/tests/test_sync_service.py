@@ -0,0 +1,59 @@
+"""
+Tests para el servicio de sincronización.
+"""
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.sync_service import SyncService
+
+
+class TestSyncBatch:
+    """Tests de la sincronización en lote."""
+    
+    async def test_sync_batch_upsert_por_tipo(self):
+        """Test que cada tipo se escribe con un upsert multi-row y un solo commit."""
+        statements = []
+        
+        async def execute(stmt, *args):
+            statements.append(stmt)
+            result = MagicMock()
+            # cuotas: CUO-1 nueva, CUO-2 existente; responsables: RESP-1 nuevo
+            if "cache_cuotas" in str(stmt):
+                result.all.return_value = [("CUO-1", True), ("CUO-2", False)]
+            else:
+                result.all.return_value = [("RESP-1", True)]
+            return result
+        
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=execute)
+        session.commit = AsyncMock()
+        
+        @asynccontextmanager
+        async def session_maker():
+            yield session
+        
+        service = SyncService.__new__(SyncService)
+        with patch('app.services.sync_service.async_session_maker', session_maker), \
+                patch('app.services.sync_service._registrar_logs', new_callable=AsyncMock) as mock_logs:
+            stats = await service.sync_batch([
+                ("cuota", "CUO-2", {"estado": "pendiente"}),
+                ("responsable", "RESP-1", {"nombre": "Ana", "whatsapp": "+5491100000001"}),
+                ("cuota", "CUO-1", {"estado": "pendiente"}),
+                ("cuota", "CUO-2", {"estado": "pagada"}),
+            ])
+        
+        assert stats == {"create": 2, "update": 1}
+        assert len(statements) == 2
+        sql = str(statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (erp_cuota_id) DO UPDATE" in sql
+        assert "xmax = 0" in sql
+        session.commit.assert_awaited_once()
+        
+        logs = mock_logs.call_args.args[1]
+        assert {(log["erp_id"], log["accion"]) for log in logs} == {
+            ("CUO-1", "create"), ("CUO-2", "update"), ("RESP-1", "create")
+        }
+        # ID repetido: quedan los últimos datos
+        assert next(log for log in logs if log["erp_id"] == "CUO-2")["payload"] == {"estado": "pagada"}
@@ -0,0 +1,37 @@
+"""
+Tests para los tipos de columna compartidos.
+"""
+from sqlalchemy.dialects import postgresql
+
+from app.models.types import PhoneNumber, int_to_phone, phone_to_int
+
+
+class TestPhoneNumber:
+    """Tests de la normalización de números de WhatsApp."""
+    
+    def test_phone_to_int_quita_formato(self):
+        """Test que se descartan +, espacios y guiones."""
+        assert phone_to_int("+54 9 11 1234-5001") == 5491112345001
+        assert phone_to_int("5491112345001") == 5491112345001
+    
+    def test_phone_to_int_sin_digitos(self):
+        """Test que un número sin dígitos (o None) da None."""
+        assert phone_to_int("whatsapp:") is None
+        assert phone_to_int("") is None
+        assert phone_to_int(None) is None
+    
+    def test_int_to_phone(self):
+        """Test que el entero se formatea como E.164."""
+        assert int_to_phone(5491112345001) == "+5491112345001"
+        assert int_to_phone(None) is None
+    
+    def test_phone_number_ida_y_vuelta(self):
+        """Test que el tipo guarda BIGINT y lee E.164 con '+'."""
+        phone_type = PhoneNumber()
+        dialect = postgresql.dialect()
+        
+        stored = phone_type.process_bind_param("549 11 1234-5001", dialect)
+        
+        assert stored == 5491112345001
+        assert phone_type.process_result_value(stored, dialect) == "+5491112345001"
+        assert phone_type.process_bind_param(None, dialect) is None
@@ -0,0 +1,37 @@
+"""
+Tests para la BD vectorial institucional.
+"""
+import json
+
+import httpx
+
+from app.services.vector_store import InstitucionalVectorStore, fragmentos_institucionales
+
+
+class TestVectorStore:
+    """Tests de embeddings y fragmentos."""
+
+    async def test_embed_envia_texto_original_y_cachea_normalizado(self):
+        """Test que se embebe la consulta original y el cache usa la normalizada."""
+        inputs = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            inputs.append(json.loads(request.content)["input"])
+            return httpx.Response(200, json={"data": [{"index": 0, "embedding": [0.1, 0.2]}]})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            store = InstitucionalVectorStore(embeddings_url="http://emb", client=http_client)
+            assert await store.embed(" Horario de Primaria ") == [0.1, 0.2]
+            assert await store.embed("horario de primaria") == [0.1, 0.2]
+
+        assert inputs == [["Horario de Primaria"]]
+
+    def test_fragmentos_institucionales(self):
+        """Test que cada entrada de segundo nivel es un fragmento con clave única."""
+        fragmentos = fragmentos_institucionales({
+            "contacto": {"email": "info@colegio.edu.ar", "telefono": "4555-1234"}
+        })
+
+        assert [f["clave"] for f in fragmentos] == ["contacto.email", "contacto.telefono"]
+        assert fragmentos[0]["seccion"] == "contacto"
+        assert "info@colegio.edu.ar" in fragmentos[0]["contenido"]
@@ -123,6 +123,30 @@ class TestWebhooksWhatsApp:
         )
         
         assert response.status_code == 403
+    
+    def test_webhook_whatsapp_llm_no_disponible(self, client):
+        """Sin LLM (modo degradado) el webhook acepta y responde con contingencia."""
+        from app.api.webhooks_whatsapp import MENSAJE_LLM_NO_DISPONIBLE
+        
+        client.app.state.llm_ready = False
+        try:
+            with patch('app.api.webhooks_whatsapp.get_whatsapp_service') as mock_ws, \
+                    patch('app.api.webhooks_whatsapp.registrar_interaccion', new_callable=AsyncMock), \
+                    patch('app.api.webhooks_whatsapp.get_agente') as mock_agente:
+                mock_ws.return_value.send_message = AsyncMock()
+                
+                response = client.post(
+                    "/webhook/whatsapp",
+                    json={"from_number": "+5491112345678", "text": "Quiero un plan de pagos"}
+                )
+        finally:
+            client.app.state.llm_ready = True
+        
+        assert response.status_code == 200
+        mock_agente.assert_not_called()
+        mock_ws.return_value.send_message.assert_awaited_once_with(
+            "+5491112345678", MENSAJE_LLM_NO_DISPONIBLE
+        )
 
 
 class TestHealthEndpoints:
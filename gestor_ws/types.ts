@@ -190,8 +190,6 @@ export interface HealthERPResponse {
 export interface WebhookWhatsAppResponse {
   status: "ok" | "error";
   ruta?: string;
-  agente?: string;
-  respuesta_preview?: string;
   error?: string;
 }
 
@@ -2,13 +2,14 @@
 MCP Tools Server - FastAPI Application.
 Expone herramientas via REST API y protocolo MCP.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, Union
 
 from app.config import settings
 from app.mcp.server import mcp_server
@@ -120,10 +121,17 @@ async def list_tools(category: Optional[str] = None):
             }
             for t in tools
         ],
-        "count": len(tools)
+        "count": len(tools),
+        "version": registry.get_version()
     }
 
 
+@app.get("/tools/version")
+async def get_tools_version():
+    """Versión del set de tools (para invalidar caches de clientes)."""
+    return {"version": registry.get_version()}
+
+
 @app.get("/tools/{tool_name}")
 async def get_tool_schema(tool_name: str):
     """Obtiene el schema de una herramienta específica."""
@@ -155,16 +163,24 @@ async def call_tool(tool_name: str, request: ToolCallRequest):
 
 
 @app.post("/mcp")
-async def mcp_endpoint(request: MCPRequest):
+async def mcp_endpoint(request: Union[MCPRequest, list[MCPRequest]]):
     """
     Endpoint MCP JSON-RPC.
     
+    Acepta una request o un batch (array JSON-RPC 2.0); las requests
+    de un batch se ejecutan en paralelo y se responde un array.
+    
     Métodos soportados:
     - tools/list: Lista herramientas
     - tools/call: Ejecuta herramienta
     - tools/schema: Obtiene schema
     - ping: Health check
     """
+    if isinstance(request, list):
+        return await asyncio.gather(
+            *(mcp_server.handle_request(r.model_dump()) for r in request)
+        )
+    
     response = await mcp_server.handle_request(request.model_dump())
     return response
 
@@ -1,6 +1,8 @@
 """
 Tool Registry - Registro centralizado de herramientas MCP.
 """
+import hashlib
+import json
 import logging
 from typing import Callable, Any, Optional
 from dataclasses import dataclass, field
@@ -139,6 +141,15 @@ class ToolRegistry:
             for t in self._tools.values()
         ]
     
+    def get_version(self) -> str:
+        """
+        Versión del set de tools: hash de los schemas.
+        Cambia si se agrega, quita o modifica alguna tool.
+        """
+        schemas = sorted(self.get_tools_schema(), key=lambda t: t["name"])
+        raw = json.dumps(schemas, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    
     async def call_tool(
         self,
         name: str,
@@ -105,6 +105,17 @@ async def test_call_kg_tool(client):
     assert "horarios" in data["data"]
 
 
+@pytest.mark.asyncio
+async def test_tools_version(client):
+    """Test versión del set de tools."""
+    response = await client.get("/tools/version")
+    assert response.status_code == 200
+    
+    version = response.json()["version"]
+    tools = (await client.get("/tools")).json()
+    assert tools["version"] == version
+
+
 @pytest.mark.asyncio
 async def test_mcp_endpoint_list(client):
     """Test endpoint MCP - listar tools."""
@@ -156,6 +167,29 @@ async def test_mcp_endpoint_ping(client):
     assert data["result"]["status"] == "pong"
 
 
+@pytest.mark.asyncio
+async def test_mcp_endpoint_batch(client):
+    """Test endpoint MCP - batch JSON-RPC."""
+    response = await client.post("/mcp", json=[
+        {
+            "jsonrpc": "2.0",
+            "method": "tools/call",
+            "params": {
+                "name": "consultar_estado_cuenta",
+                "arguments": {"whatsapp": "+5491112345001"}
+            },
+            "id": "batch-1"
+        },
+        {"jsonrpc": "2.0", "method": "ping", "params": {}, "id": "batch-2"}
+    ])
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert [item["id"] for item in data] == ["batch-1", "batch-2"]
+    assert data[0]["result"]["success"] == True
+    assert data[1]["result"]["status"] == "pong"
+
+
 @pytest.mark.asyncio
 async def test_categories(client):
     """Test listar categorías."""